@@ -0,0 +1,69 @@
+# 콜드 스타트 측정: 모듈 import 시간과 첫 화면 렌더 시간을 예산과 비교합니다.
+#   python benchmarks/bench_startup.py
+# 시트 연결 없이 (secrets 없음) 측정하므로 네트워크 시간은 포함되지 않습니다.
+import os
+import sys
+import json
+import time
+import subprocess
+import statistics
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- 예산 (ms) ---
+IMPORT_BUDGET_MS = 900
+SETUP_RENDER_BUDGET_MS = 1500
+RESULT_RENDER_BUDGET_MS = 2500
+# 첫 화면까지 불러오면 안 되는 무거운 모듈
+LAZY_MODULES = ['pandas', 'gspread', 'oauth2client']
+
+IMPORT_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import logic, views
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({'ms': ms, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+RENDER_PROBE = """
+import os, sys, time, json
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(%r, default_timeout=60)
+# 가짜 선수가 든 쓰기 저널이 앱 폴더에 남지 않게 임시 실행 폴더에 씀
+at.secrets['storage'] = {'journal': os.path.join(os.getcwd(), 'journal.jsonl')}
+t = time.perf_counter(); at.run(); setup_ms = (time.perf_counter() - t) * 1000
+for i in range(4): at.text_input(key=f'name_{i}').input(f'P{i}')
+at.button[-1].click().run()
+at.button[-1].click()
+t = time.perf_counter(); at.run(); result_ms = (time.perf_counter() - t) * 1000
+print(json.dumps({'setup_ms': setup_ms, 'result_ms': result_ms, 'step': at.session_state.step}))
+""" % (os.path.join(APP_DIR, 'app.py'),)
+
+def run_probe(code, cwd):
+    env = dict(os.environ, PYTHONPATH=APP_DIR, STREAMLIT_LOGGER_LEVEL='error')
+    out = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main(repeat=5):
+    import tempfile
+    cwd = tempfile.mkdtemp()  # secrets.toml 이 없는 곳에서 실행 (저널도 여기에)
+    imports = [run_probe(IMPORT_PROBE, cwd) for _ in range(repeat)]
+    renders = [run_probe(RENDER_PROBE, cwd) for _ in range(max(1, repeat // 2))]
+    assert all(r['step'] == 3 for r in renders), '결과 화면까지 가지 못했습니다'
+    report = {
+        'import_ms': statistics.median(r['ms'] for r in imports),
+        'eager_heavy_modules': sorted(set(m for r in imports for m in r['loaded'])),
+        'setup_render_ms': statistics.median(r['setup_ms'] for r in renders),
+        'result_render_ms': statistics.median(r['result_ms'] for r in renders),
+    }
+    checks = {
+        'import_ms': report['import_ms'] <= IMPORT_BUDGET_MS,
+        'eager_heavy_modules': not report['eager_heavy_modules'],
+        'setup_render_ms': report['setup_render_ms'] <= SETUP_RENDER_BUDGET_MS,
+        'result_render_ms': report['result_render_ms'] <= RESULT_RENDER_BUDGET_MS,
+    }
+    for k, v in report.items(): print(f"{k:22s} {v if isinstance(v, list) else f'{v:8.1f}'}  {'OK' if checks[k] else 'OVER BUDGET'}")
+    return 0 if all(checks.values()) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# 송금 최소화 벤치마크: 그리디 대비 송금 건수와 계산 시간 (인원별)
+#   python benchmarks/bench_transfers.py
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import min_transfers, greedy_transfers
+
+FRAME_BUDGET_MS = 16.0   # 12명 기준 p99 가 이 안에 들어와야 함
+
+# 실제 라운드처럼 천 원 단위, 일부는 작은 그룹끼리 상쇄되도록 생성
+def random_balances(n, rng):
+    bal = [rng.randint(-30, 30) * 1000 for _ in range(n - 1)]
+    bal.append(-sum(bal))
+    return bal
+
+def grouped_balances(n, rng):
+    bal = []
+    while len(bal) < n:
+        k = min(n - len(bal), rng.randint(2, 4))
+        g = [rng.randint(-10, 10) * 1000 for _ in range(k - 1)]
+        bal += g + [-sum(g)]
+    rng.shuffle(bal)
+    return bal
+
+def pct(xs, q): return sorted(xs)[min(len(xs) - 1, int(len(xs) * q))]
+
+def main(rounds=300, sizes=(4, 6, 8, 10, 12, 16, 20, 30)):
+    rng = random.Random(7)
+    ok = True
+    print(f"{'n':>3} {'kind':8} {'greedy':>7} {'optimal':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in sizes:
+        for kind, gen in (('random', random_balances), ('grouped', grouped_balances)):
+            g_cnt = o_cnt = 0; times = []
+            for _ in range(rounds):
+                bal = gen(n, rng)
+                g_cnt += len(greedy_transfers(bal))
+                t = time.perf_counter(); o_cnt += len(min_transfers(bal)); times.append((time.perf_counter() - t) * 1000)
+            p99 = pct(times, 0.99)
+            if n == 12 and p99 > FRAME_BUDGET_MS: ok = False
+            print(f"{n:>3} {kind:8} {g_cnt / rounds:7.2f} {o_cnt / rounds:7.2f} {pct(times, 0.5):8.2f} {p99:8.2f}")
+    print("12명 프레임 예산:", "OK" if ok else "OVER BUDGET")
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
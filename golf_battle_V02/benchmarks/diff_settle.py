@@ -0,0 +1,161 @@
+# 정산 엔진 차등 테스트: engine.RuleSet 의 두 정산 방식이 예전 두 앱의 정산 함수와 홀마다 같은 결과를 내는지
+# 무작위 홀 수백만 개로 확인하고, 예전 함수 / 새 한 홀 정산 / 새 행렬 정산의 홀당 시간을 비교합니다.
+#   python benchmarks/diff_settle.py                  (방식마다 100만 홀)
+#   python benchmarks/diff_settle.py --holes 200000 --seed 3
+# 다른 결과가 나오면 첫 사례를 찍고 종료코드 1
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import DEFAULT_RULESET, WINNERS_RULESET
+
+MAX_N = 12
+DIFF_CHOICES = np.array([-2, -1, -1, 0, 0, 0, 0, 1, 1, 1, 2, 2, 3, 4])
+
+# --- 예전 정산 (비교 기준, 처음 버전 그대로) ---
+# logic.calculate_settlement: 모든 쌍 타당 + 언더파 보너스 (세션 대신 점수 리스트와 파를 받음)
+def legacy_check_baepan(scores, par, num_players):
+    reasons = []; is_baepan = False
+    if any(s < par for s in scores): reasons.append("언더파"); is_baepan = True
+    if any((s - par) >= 3 for s in scores): reasons.append("트리플보기+"); is_baepan = True
+    if par == 3 and any((s - par) >= 2 for s in scores): reasons.append("파3 더블+"); is_baepan = True
+    cnt = Counter(scores)
+    if cnt and max(cnt.values()) > (num_players/2): reasons.append("과반수 동타"); is_baepan = True
+    return is_baepan, reasons
+
+def legacy_pairwise(scores, par, BASE_STAKE=1000, BAEPAN_MULTIPLIER=1, BONUS_AMOUNT=2000):
+    num_players = len(scores)
+    is_baepan, baepan_reasons = legacy_check_baepan(scores, par, num_players)
+    stake = BASE_STAKE * BAEPAN_MULTIPLIER if is_baepan else BASE_STAKE
+    m_str = [0]*num_players; m_bon = [0]*num_players
+    for i in range(num_players):
+        for j in range(i+1, num_players):
+            amt = (scores[j]-scores[i])*stake
+            m_str[i]+=amt; m_str[j]-=amt
+    under = [i for i, s in enumerate(scores) if s < par]
+    for w in under:
+        for l in range(num_players):
+            if w!=l: m_bon[w]+=BONUS_AMOUNT; m_bon[l]-=BONUS_AMOUNT
+    return [a + b for a, b in zip(m_str, m_bon)], is_baepan, baepan_reasons
+
+# GolfGame.calculate_hole: 배판일 때만 승자가 받는 타당 + 언더파 보너스 (선수 = 점수 리스트의 인덱스)
+def legacy_winners(score_list, current_par):
+    players = list(range(len(score_list)))
+    scores = dict(zip(players, score_list))
+    min_score = min(scores.values())
+    winners = [p for p, s in scores.items() if s == min_score]
+    is_baepan = False
+    reasons = []
+    if any(s < current_par for s in scores.values()):
+        is_baepan = True
+        reasons.append("언더파 발생")
+    if any(s >= current_par + 3 for s in scores.values()):
+        is_baepan = True
+        reasons.append("트리플보기 이상")
+    if current_par == 3 and any(s >= 5 for s in scores.values()):
+        is_baepan = True
+        reasons.append("파3 더블보기 이상")
+    score_counts = {}
+    for s in scores.values():
+        score_counts[s] = score_counts.get(s, 0) + 1
+    max_tie_count = max(score_counts.values())
+    if max_tie_count > (len(players) / 2):
+        is_baepan = True
+        reasons.append(f"동타 인원 과반({max_tie_count}명)")
+    round_ledger = {p: 0 for p in players}
+    if is_baepan:
+        for p, score in scores.items():
+            if p not in winners:
+                diff = score - min_score
+                amount_per_winner = diff * 1000
+                for w in winners:
+                    round_ledger[p] -= amount_per_winner
+                    round_ledger[w] += amount_per_winner
+    for p, score in scores.items():
+        if score < current_par:
+            bonus_amt = 2000
+            for other in players:
+                if other != p:
+                    round_ledger[other] -= bonus_amt
+                    round_ledger[p] += bonus_amt
+    return [round_ledger[p] for p in players], is_baepan, reasons
+
+# 방식별 (예전 함수, 새 규칙, 미입력(0) 포함 여부). GolfGame 은 점수를 다 받은 뒤에만 정산함
+MODES = {
+    'pairwise': (legacy_pairwise, DEFAULT_RULESET, True),
+    'winners': (legacy_winners, WINNERS_RULESET, False),
+}
+
+# --- 무작위 홀 ---
+# 인원별 묶음: {n: (점수 (홀, n), 파 (홀,))}. 동타/배판/미입력이 골고루 나오도록 파 대비 분포를 좁게
+def generate(holes, seed, with_missing):
+    rng = np.random.default_rng(seed)
+    ns = rng.integers(1, MAX_N + 1, holes)
+    out = {}
+    for n in range(1, MAX_N + 1):
+        k = int((ns == n).sum())
+        if not k: continue
+        pars = rng.choice([3, 4, 4, 5], k)
+        scores = pars[:, None] + rng.choice(DIFF_CHOICES, (k, n))
+        if with_missing: scores[rng.random((k, n)) < 0.05] = 0
+        out[n] = (scores.astype(np.int64), pars.astype(np.int64))
+    return out
+
+def run_mode(mode, holes, seed):
+    legacy, rules, with_missing = MODES[mode]
+    groups = generate(holes, seed, with_missing)
+    t_legacy = t_scalar = t_batch = 0.0; checked = 0
+    for n, (scores, pars) in groups.items():
+        # 새 행렬 정산: 홀 묶음 전체를 (선수, 홀) 한 장으로
+        t = time.perf_counter()
+        res = rules.settle(scores.T, pars)
+        total = res.total.T; baepan = res.baepan
+        t_batch += time.perf_counter() - t
+        rows = scores.tolist(); par_list = pars.tolist()
+        t = time.perf_counter()
+        old = [legacy(row, par) for row, par in zip(rows, par_list)]
+        t_legacy += time.perf_counter() - t
+        t = time.perf_counter()
+        new = [rules.settle_hole(row, par) for row, par in zip(rows, par_list)]
+        t_scalar += time.perf_counter() - t
+        old_total = np.array([o[0] for o in old], dtype=np.int64).reshape(len(rows), n)
+        old_baepan = np.array([o[1] for o in old])
+        new_total = np.array([[a + b for a, b in zip(m[0], m[1])] for m in new], dtype=np.int64).reshape(len(rows), n)
+        # 사유: 예전 목록 == 한 홀 목록 (글자 그대로), 한 홀 목록을 마스크로 바꿔 행렬 마스크와 비교
+        # 사유 이름의 {count} 는 1~n 명으로 채운 모든 표기를 같은 조건으로 봄
+        col = {r.replace('{count}', str(c)): j for j, r in enumerate(rules.reasons) for c in range(n + 1)}
+        new_mask = np.zeros(res.reasons.shape, dtype=bool)
+        for i, m in enumerate(new):
+            for r in m[3]: new_mask[col[r], i] = True
+        wrong = (old_total != total).any(axis=1) | (old_total != new_total).any(axis=1) | (old_baepan != baepan) | (new_mask != res.reasons).any(axis=0)
+        wrong |= np.array([o[2] != m[3] for o, m in zip(old, new)])
+        bad = np.flatnonzero(wrong)
+        if len(bad):
+            i = bad[0]
+            print(f"[{mode}] 불일치: 점수 {rows[i]} 파 {par_list[i]}")
+            print(f"  예전 {old[i]}")
+            print(f"  한 홀 {new[i]}")
+            print(f"  행렬 {total[i].tolist()} 배판={bool(baepan[i])} 사유={res.hole_reasons(i)}")
+            return False
+        checked += len(rows)
+    us = lambda t: t / checked * 1e6
+    print(f"{mode:9s} {checked:>9,}홀 일치   예전 {us(t_legacy):6.2f} us/홀   한 홀 {us(t_scalar):6.2f} us/홀 ({t_legacy / t_scalar:4.1f}x)"
+          f"   행렬 {us(t_batch):6.3f} us/홀 ({t_legacy / t_batch:5.0f}x)")
+    return True
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="정산 방식별 예전 함수 대비 차등 테스트")
+    ap.add_argument('--holes', type=int, default=1_000_000, help="방식마다 만들 홀 수")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--mode', choices=list(MODES), action='append', help="특정 방식만 (여러 번 가능)")
+    args = ap.parse_args(argv)
+    ok = True
+    for mode in args.mode or list(MODES):
+        ok = run_mode(mode, args.holes, args.seed) and ok
+    return 0 if ok else 1
+
+if __name__ == '__main__': sys.exit(main())
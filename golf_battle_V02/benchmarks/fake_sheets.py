@@ -0,0 +1,228 @@
+# 벤치마크용 메모리 구글 시트 (gspread 대용)
+# API 호출 횟수를 세고, 호출마다 지연(latency)을 넣을 수 있습니다.
+import re
+import time
+import collections
+import threading
+import sheets
+import storage
+
+def col_index(letters):
+    n = 0
+    for ch in letters: n = n * 26 + ord(ch.upper()) - 64
+    return n
+
+# 'A2:AZ2', 'Scores!A3', 'A2:Z100' -> (r1, c1, r2, c2) (1부터, r2/c2 는 None 이면 끝까지)
+def parse_a1(a1):
+    a1 = a1.split('!')[-1]
+    parts = a1.split(':')
+    def one(p):
+        m = re.fullmatch(r'([A-Za-z]*)(\d*)', p)
+        return (int(m.group(2)) if m.group(2) else None), (col_index(m.group(1)) if m.group(1) else None)
+    r1, c1 = one(parts[0])
+    r2, c2 = one(parts[1]) if len(parts) > 1 else (r1, c1)
+    return r1 or 1, c1 or 1, r2, c2
+
+# 실제 API 처럼 할당량을 넘기면 429 응답을 흉내냄
+class FakeResponse:
+    def __init__(self, status_code): self.status_code = status_code
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f'APIError {status_code}')
+        self.response = FakeResponse(status_code)
+
+class ApiCounter:
+    # quota=(호출 수, 초): 그 시간 창 안에서 읽기/쓰기 각각 호출 수를 넘기면 429 (실제 할당량처럼 따로 셈)
+    def __init__(self, latency=0.0, quota=None):
+        self.latency = latency; self.quota = quota
+        self.calls = {}
+        self.touched = {}
+        self.windows = {'read': collections.deque(), 'write': collections.deque()}
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def hit(self, name):
+        with self.lock:
+            if self.quota and name != 'authorize':
+                limit, span = self.quota; now = time.monotonic()
+                window = self.windows['read' if name in sheets.READ_METHODS or name == 'open_by_url' else 'write']
+                while window and now - window[0] > span: window.popleft()
+                if len(window) >= limit:
+                    self.rejected += 1
+                    raise FakeAPIError(429)
+                window.append(now)
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency: time.sleep(self.latency)
+
+    # 일괄 호출이 건드린 시트 (게임별 분리 확인용)
+    def touch(self, title):
+        with self.lock: self.touched[title] = self.touched.get(title, 0) + 1
+
+    def total(self): return sum(self.calls.values())
+    def reset(self): self.calls.clear(); self.touched.clear()
+
+class FakeCell:
+    def __init__(self, row, col, value):
+        self.row = row; self.col = col; self.value = value
+
+class FakeWorksheet:
+    def __init__(self, title, rows, cols, api):
+        self.title = title; self.row_count = rows; self.col_count = cols
+        self.api = api
+        self.cells = {}  # (row, col) -> str
+
+    def _grid(self):
+        if not self.cells: return []
+        max_r = max(r for r, _ in self.cells); max_c = max(c for _, c in self.cells)
+        return [[self.cells.get((r, c), '') for c in range(1, max_c + 1)] for r in range(1, max_r + 1)]
+
+    def _set(self, r, c, v):
+        v = '' if v is None else str(v)
+        if v == '': self.cells.pop((r, c), None)
+        else: self.cells[(r, c)] = v
+
+    def _write_rows(self, r, c, values):
+        for i, row in enumerate(values):
+            for j, v in enumerate(row): self._set(r + i, c + j, v)
+
+    def _read(self, a1):
+        r1, c1, r2, c2 = parse_a1(a1)
+        # 값이 있는 칸 중 범위 안의 것만 모음 (시트 전체 격자는 만들지 않음)
+        rows = {}
+        for (r, c), v in self.cells.items():
+            if r1 <= r <= (r2 or r) and c1 <= c <= (c2 or c): rows.setdefault(r, {})[c] = v
+        if not rows: return []
+        # 실제 API 처럼 끝쪽 빈 칸/빈 행은 잘라서 돌려줌
+        return [[rows[r].get(c, '') for c in range(c1, max(rows[r]) + 1)] if r in rows else [] for r in range(r1, max(rows) + 1)]
+
+    def row_values(self, row):
+        self.api.hit('row_values')
+        grid = self._grid()
+        vals = list(grid[row - 1]) if row <= len(grid) else []
+        while vals and vals[-1] == '': vals.pop()
+        return vals
+
+    def get_all_values(self):
+        self.api.hit('get_all_values')
+        return self._grid()
+
+    def get(self, a1):
+        self.api.hit('get')
+        return self._read(a1)
+
+    def append_row(self, values):
+        self.api.hit('append_row')
+        self._write_rows(len(self._grid()) + 1, 1, [values])
+
+    def insert_row(self, values, index=1):
+        self.api.hit('insert_row')
+        shifted = {}
+        for (r, c), v in self.cells.items(): shifted[(r + 1 if r >= index else r, c)] = v
+        self.cells = shifted
+        self._write_rows(index, 1, [values])
+
+    def range(self, a1):
+        self.api.hit('range')
+        r1, c1, r2, c2 = parse_a1(a1)
+        return [FakeCell(r, c, self.cells.get((r, c), '')) for r in range(r1, (r2 or r1) + 1) for c in range(c1, (c2 or c1) + 1)]
+
+    def update_cells(self, cells):
+        self.api.hit('update_cells')
+        for cell in cells: self._set(cell.row, cell.col, cell.value)
+
+    def update(self, values, range_name='A1'):
+        self.api.hit('update')
+        r, c, _, _ = parse_a1(range_name)
+        self._write_rows(r, c, values)
+
+    def batch_update(self, data, **kwargs):
+        self.api.hit('batch_update')
+        for d in data:
+            r, c, _, _ = parse_a1(d['range'])
+            self._write_rows(r, c, d['values'])
+
+    def batch_clear(self, ranges):
+        self.api.hit('batch_clear')
+        for a1 in ranges: self._clear(a1)
+
+    def _clear(self, a1):
+        r1, c1, r2, c2 = parse_a1(a1)
+        for (r, c) in list(self.cells):
+            if r1 <= r <= (r2 or r) and c1 <= c <= (c2 or c): del self.cells[(r, c)]
+
+class FakeSpreadsheet:
+    def __init__(self, api):
+        self.api = api
+        self.sheets = {}
+
+    def worksheet(self, title):
+        self.api.hit('worksheet')
+        if title not in self.sheets: raise LookupError(f"WorksheetNotFound: {title}")
+        return self.sheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.api.hit('add_worksheet')
+        ws = self.sheets[title] = FakeWorksheet(title, rows, cols, self.api)
+        return ws
+
+    def _sheet(self, a1):
+        title = a1.split('!')[0].strip("'")
+        self.api.touch(title)
+        return self.sheets[title]
+
+    # 스프레드시트 단위 일괄 읽기/쓰기 (시트 여러 개를 한 번의 호출로)
+    def values_batch_get(self, ranges, params=None):
+        self.api.hit('values_batch_get')
+        out = []
+        for a1 in ranges:
+            vals = self._sheet(a1)._read(a1)
+            out.append({'range': a1, 'values': vals} if vals else {'range': a1})
+        return {'valueRanges': out}
+
+    def values_batch_clear(self, params=None, body=None):
+        self.api.hit('values_batch_clear')
+        for a1 in body['ranges']: self._sheet(a1)._clear(a1)
+
+    def values_batch_update(self, body):
+        self.api.hit('values_batch_update')
+        for d in body['data']:
+            r, c, _, _ = parse_a1(d['range'])
+            self._sheet(d['range'])._write_rows(r, c, d['values'])
+
+class FakeClient:
+    def __init__(self, api, wb):
+        self.api = api; self.wb = wb
+
+    def open_by_url(self, url):
+        self.api.hit('open_by_url')
+        return self.wb
+
+# 실제 SheetPool 과 같은 캐시 동작을 유지하고, 인증만 가짜 클라이언트로 바꿈
+class FakePool(sheets.SheetPool):
+    # limiter=None 이면 호출량 제한 없이 (API 호출 수/시간만 재는 경우)
+    def __init__(self, latency=0.0, quota=None, limiter=None, wide=False):
+        super().__init__({}, 'fake://sheet')
+        self.limiter = limiter or sheets.RateLimiter(float('inf'), float('inf'), burst=float('inf'))
+        self.api = ApiCounter(latency, quota)
+        self.fake_wb = FakeSpreadsheet(self.api)
+        # 기본 게임 시트는 이미 만들어져 있는 배포처럼 시작 (wide=True 면 예전 가로 배치의 빈 시트 두 개만)
+        for title, (rows, cols) in zip(storage.sheet_titles(), storage.sheet_sizes()):
+            if wide and title not in ('Settings', 'Scores'): continue
+            self.fake_wb.sheets[title] = FakeWorksheet(title, rows, cols, self.api)
+
+    def authorize(self):
+        self.api.hit('authorize')
+        self.stats['auth'] += 1
+        return FakeClient(self.api, self.fake_wb)
+
+# logic 이 쓰는 저장소를 가짜 풀 위의 SheetsStorage 로 교체 (게임마다 하나)
+def install(latency=0.0, quota=None, limiter=None, wide=False):
+    pool = FakePool(latency, quota, limiter, wide)
+    stores = {}
+    def get_storage(game=storage.DEFAULT_GAME):
+        if game not in stores: stores[game] = storage.SheetsStorage(game)
+        return stores[game]
+    sheets.get_pool = lambda: pool
+    storage.get_storage = get_storage
+    return pool
@@ -0,0 +1,438 @@
+# 벤치마크 모음: 정산/송금/동기화를 인원, 홀 수, 점수 채움 정도별로 측정하고 JSON 리포트로 남깁니다.
+#   python benchmarks/run.py --out bench.json
+#   python benchmarks/run.py --out new.json --compare bench.json   (API 호출 수 증가나 CPU 시간 회귀 시 종료코드 1)
+# 동기화/저장은 fake_sheets 의 메모리 시트를 쓰므로 네트워크 없이 API 호출 수를 셉니다.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from collections import Counter
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(APP_DIR)
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+import numpy as np
+import streamlit as st
+import logic
+import engine
+import sheets
+import storage
+import simulate
+import fake_sheets
+
+# bare 모드(streamlit run 없이 실행) 경고 숨김
+for name in list(logging.root.manager.loggerDict):
+    if name.startswith('streamlit'): logging.getLogger(name).setLevel(logging.ERROR)
+
+SHEET_PLAYERS = [2, 4, 8, 12, 100, 500]
+CORE_PLAYERS = [2, 4, 8, 12, 24, 48, 100, 500]
+HOLES = [9, 18]
+FILLS = ['filled', 'sparse']
+
+# --- 가상 라운드 ---
+def make_round(n, holes, fill, seed=0):
+    rng = random.Random(seed * 1000 + n * 37 + holes)
+    pars = {h: rng.choice([3, 4, 4, 4, 5]) for h in range(1, 19)}
+    scores = [{} for _ in range(n)]
+    for h in range(1, holes + 1):
+        if fill == 'sparse' and rng.random() < 0.5: continue
+        for i in range(n):
+            if fill == 'sparse' and rng.random() < 0.3: continue
+            scores[i][h] = pars[h] + rng.choice([-1, 0, 0, 1, 1, 1, 2, 3])
+    return pars, scores
+
+def load_session(n, holes, fill):
+    pars, scores = make_round(n, holes, fill)
+    st.session_state.round = make_state(n, holes, pars, scores)
+    st.session_state.game_info = {'current_hole': holes, 'par': 4, 'participants_count': n, 'cart_count': 1 + (n - 1) // 4}
+    logic.invalidate_ledger()
+    return pars, scores
+
+def make_state(n, holes, pars, scores):
+    rnd = engine.RoundState([f'P{i}' for i in range(n)], [1 + i // 4 for i in range(n)])
+    for h in range(1, holes + 1): rnd.set_hole(h, pars[h], [scores[i].get(h, 0) for i in range(n)])
+    return rnd
+
+# 예전 세션 상태: 선수마다 {'id','name','cart','scores': {홀: 점수}} + 홀별 파 dict + 정산 화면을 본 홀마다 결과표(history)
+def make_legacy_state(n, holes, pars, scores):
+    players = [{'id': i, 'name': f'P{i}', 'cart': 1 + i // 4, 'scores': dict(scores[i])} for i in range(n)]
+    hole_pars = {h: pars[h] for h in range(1, holes + 1)}
+    history = {}
+    for h in range(1, holes + 1):
+        sc = [p['scores'].get(h, 0) for p in players]
+        m_str, m_bon, _, _ = engine.settle_hole(sc, hole_pars[h])
+        history[h] = [{'이름': p['name'], '스코어': sc[i], '타당정산': m_str[i], '보너스': m_bon[i], '합계': m_str[i] + m_bon[i]}
+                      for i, p in enumerate(players)]
+    return players, hole_pars, history
+
+# 예전 배판 판정: 조건을 코드에 박아 두고 홀마다 따로 검사 (규칙 엔진 비교용)
+def legacy_check_baepan(scores, par, num_players):
+    reasons = []
+    if any(s < par for s in scores): reasons.append("언더파")
+    if any((s - par) >= 3 for s in scores): reasons.append("트리플보기+")
+    if par == 3 and any((s - par) >= 2 for s in scores): reasons.append("파3 더블+")
+    cnt = Counter(scores)
+    if cnt and max(cnt.values()) > (num_players / 2): reasons.append("과반수 동타")
+    return len(reasons) > 0, reasons
+
+# --- 측정 ---
+def measure(fn, min_time=0.2, max_reps=2000):
+    fn()  # 워밍업
+    walls = []; cpu0 = time.process_time(); start = time.perf_counter()
+    while len(walls) < max_reps and (time.perf_counter() - start) < min_time or len(walls) < 5:
+        t = time.perf_counter(); fn(); walls.append(time.perf_counter() - t)
+    cpu = (time.process_time() - cpu0) / len(walls)
+    return {'us_median': statistics.median(walls) * 1e6, 'us_min': min(walls) * 1e6, 'cpu_us': cpu * 1e6, 'reps': len(walls)}
+
+def api_profile(pool, fn):
+    pool.api.reset(); fn()
+    return dict(pool.api.calls)
+
+# --- 케이스 ---
+def core_cases(quick):
+    players = CORE_PLAYERS[:4] if quick else CORE_PLAYERS
+    for n in players:
+        for holes in HOLES:
+            for fill in FILLS:
+                params = {'players': n, 'holes': holes, 'fill': fill}
+                cols = []; grid = {}
+                def setup(n=n, holes=holes, fill=fill, cols=cols, grid=grid):
+                    pars, scores = load_session(n, holes, fill)
+                    cols[:] = [([s.get(h, 0) for s in scores], pars[h]) for h in range(1, holes + 1)]
+                    grid['scores'] = np.array([col for col, _ in cols], dtype=np.int64).T.reshape(n, holes)
+                    grid['pars'] = np.array([par for _, par in cols], dtype=np.int64)
+                def baepan_all(cols=cols, n=n):
+                    for col, par in cols: engine.check_baepan(col, par, n)
+                def baepan_legacy(cols=cols, n=n):
+                    for col, par in cols: legacy_check_baepan(col, par, n)
+                yield 'check_baepan', params, setup, baepan_all
+                yield 'baepan.per_hole', params, setup, baepan_legacy
+                yield 'baepan.batch', params, setup, lambda grid=grid: engine.DEFAULT_RULESET.masks(grid['scores'], grid['pars'])
+                yield 'calculate_settlement', params, setup, lambda: logic.calculate_settlement(st.session_state.game_info['current_hole'])
+                yield 'get_total_settlement.cold', params, setup, lambda: (logic.invalidate_ledger(), logic.get_total_settlement())
+                yield 'get_total_settlement.warm', params, setup, logic.get_total_settlement
+                yield 'calculate_transfer_details', params, setup, logic.calculate_transfer_details
+                yield 'settle_round', params, setup, lambda: logic.build_ledger()
+
+def golfgame_cases(quick):
+    try:
+        sys.path.insert(0, ROOT_DIR)
+        import golf_battle_v02
+    except Exception as e:
+        print(f"golf_battle_v02 불러오기 실패, 건너뜀: {e}"); return
+    players = [p for p in (CORE_PLAYERS[:4] if quick else CORE_PLAYERS)]
+    for n in players:
+        for holes in HOLES:
+            params = {'players': n, 'holes': holes, 'fill': 'filled'}
+            pars, scores = make_round(n, holes, 'filled')
+            game = golf_battle_v02.GolfGame()
+            for i in range(n): game.add_player(f'P{i}')
+            hole_scores = [{p: scores[i][h] for i, p in enumerate(game.players)} for h in range(1, holes + 1)]
+            def play(game=game, hole_scores=hole_scores, pars=pars):
+                for h, sc in enumerate(hole_scores, start=1):
+                    game.current_par = pars[h]; game.calculate_hole(sc)
+            def report(game=game, hole_scores=hole_scores):
+                for p in game.players: p.scores = []
+                for sc in hole_scores:
+                    for p in game.players: p.scores.append(sc[p])
+                return game.generate_html_report()
+            yield 'GolfGame.calculate_hole', params, None, play
+            yield 'GolfGame.generate_html_report', params, None, report
+
+# 저장소 교체: 'sheets' 는 가짜 시트(API 호출 수 집계), 'sqlite' 는 임시 폴더의 실제 SQLite 파일
+def install_backend(backend, latency):
+    if backend == 'sheets': return fake_sheets.install(latency)
+    import tempfile
+    store = storage.SqliteStorage(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    storage.get_storage = lambda game=storage.DEFAULT_GAME: store
+    return None
+
+def sheet_cases(quick, latency):
+    players = SHEET_PLAYERS[1:3] if quick else SHEET_PLAYERS
+    for backend, n, holes, fill in [(b, n, h, f) for b in ('sheets', 'sqlite') for n in players for h in HOLES for f in FILLS]:
+        params = {'backend': backend, 'players': n, 'holes': holes, 'fill': fill, 'latency_ms': latency * 1000}
+        holder = {}
+        def setup(n=n, holes=holes, fill=fill, backend=backend):
+            pool = holder['pool'] = install_backend(backend, latency)
+            pars, scores = load_session(n, holes, fill)
+            rnd = st.session_state.round
+            logic.save_setup_data(n, st.session_state.game_info['cart_count'], list(rnd.names), rnd.carts.tolist())
+            for h in range(1, holes + 1):
+                row = [scores[i].get(h, 0) for i in range(n)]
+                if any(row): logic.update_scores(h, pars[h], row)
+            st.session_state.sync_revs = None; logic.sync_data()
+            return pool
+        def save(holder=holder, n=n, holes=holes):
+            logic.update_scores(holes, 4, [4 + (i % 3) for i in range(n)])
+        # 다른 세션이 한 홀을 고친 뒤 동기화 (쓰기 1회 포함)
+        def remote_hole(n=n, holes=holes, flip=[0], sync=logic.sync_data):
+            flip[0] ^= 1
+            storage.get_storage().save_hole(1, 4, [4 + flip[0]] * n)
+            sync()
+        yield 'sync_data', params, setup, logic.sync_data, holder
+        yield 'sync_data.full', params, setup, lambda: (st.session_state.__setitem__('sync_revs', None), logic.sync_data()), holder
+        yield 'sync_data.remote_hole', params, setup, remote_hole, holder
+        yield 'update_scores', params, setup, save, holder
+        # 실시간 갱신 한 주기: 바뀐 게 없으면 리비전 한 칸만, 다른 세션이 한 홀을 고쳤으면 그 홀 행만 읽음
+        yield 'live_sync.idle', params, setup, logic.live_sync, holder
+        yield 'live_sync.remote_hole', params, setup, lambda: remote_hole(sync=logic.live_sync), holder
+        yield 'reset_all_data', params, setup, logic.reset_all_data, holder
+    # 18개 홀을 연달아 저장 후 flush: 백그라운드 저장은 한 번(또는 몇 번)의 batch 로 합쳐짐
+    # journal=True 는 저장마다 로컬 저널에 fsync 로 남기는 비용 포함
+    for backend, writer, journal in [(b, w, j) for b in ('sheets', 'sqlite') for w, j in ((False, False), (True, False), (True, True))]:
+        params = {'backend': backend, 'players': 8, 'holes': 18, 'writer': writer, 'journal': journal, 'latency_ms': latency * 1000}
+        holder = {}
+        def writer_setup(backend=backend, writer=writer, journal=journal):
+            import tempfile
+            holder['pool'] = install_backend(backend, latency)
+            load_session(8, 18, 'filled')
+            if writer:
+                jr = storage.Journal(os.path.join(tempfile.mkdtemp(), 'journal.jsonl')) if journal else None
+                store = storage.BackgroundWriter(storage.get_storage(), journal=jr)
+                storage.get_storage = lambda game=storage.DEFAULT_GAME: store
+            return holder['pool']
+        def burst(flip=[0]):
+            flip[0] ^= 1
+            for h in range(1, 19): logic.update_scores(h, 4, [4 + flip[0]] * 8)
+            storage.get_storage().flush()
+        yield 'update_scores.burst', params, writer_setup, burst, holder
+    # 12개 세션이 동시에 처음 동기화: 캐시가 없으면 세션 수만큼, 있으면 TTL 창마다 한 번 읽음
+    for backend, cache in [(b, c) for b in ('sheets', 'sqlite') for c in (False, True)]:
+        params = {'backend': backend, 'players': 12, 'holes': 18, 'fill': 'filled', 'sessions': 12, 'cache': cache, 'latency_ms': latency * 1000}
+        holder = {}
+        def cached_setup(backend=backend, cache=cache):
+            holder['pool'] = install_backend(backend, latency)
+            load_session(12, 18, 'filled')
+            if cache:
+                store = storage.CachedStorage(storage.get_storage())
+                storage.get_storage = lambda game=storage.DEFAULT_GAME: store
+            return holder['pool']
+        def sessions():
+            store = storage.get_storage()
+            if isinstance(store, storage.CachedStorage): store.invalidate()
+            for _ in range(12):
+                st.session_state.sync_revs = None; logic.sync_data()
+        yield 'sync_data.sessions', params, cached_setup, sessions, holder
+
+# 클럽 대회: 여러 조가 각자 게임 코드로 동시에 진행. 조마다 한 홀 저장 + 동기화 확인 한 번씩
+# 호출 수는 조 수에 비례하고, 각 조는 자기 게임의 Settings/Scores/Strokes 세 시트만 건드림 (touched 로 확인, Players 는 홀 저장에 안 씀)
+def games_cases(quick, latency):
+    for games in ((10,) if quick else (10, 30)):
+        params = {'games': games, 'players': 4, 'latency_ms': latency * 1000}
+        holder = {}
+        codes = [f'G{i:03d}' for i in range(games)]
+        def setup(codes=codes):
+            pool = holder['pool'] = fake_sheets.install(latency)
+            for code in codes:
+                store = storage.get_storage(code)
+                store.save_settings(4, 1, [f'{code}-P{i}' for i in range(4)], [1] * 4)
+                for h in range(1, 19): store.save_hole(h, 4, [4, 5, 3, 4])
+            return pool
+        def round_(codes=codes, flip=[0]):
+            flip[0] ^= 1
+            for code in codes:
+                store = storage.get_storage(code)
+                store.save_hole(1, 4, [4 + flip[0]] * 4); store.revision()
+        yield 'games.outing', params, setup, round_, holder
+
+# 할당량이 작은 가짜 시트에 읽기/쓰기를 몰아 보냄: 제한기가 있으면 429 없이 늦춰서 통과, 없으면 실패가 남
+# 시간을 줄이려고 할당량을 '1초에 20회'로 축소해서 흉내냄 (제한기도 같은 비율: 초당 15회 + 한꺼번에 5회)
+def limiter_cases(quick):
+    ops = 30 if quick else 60
+    for limited in (False, True):
+        params = {'ops': ops, 'quota_per_s': 20, 'limiter': limited}
+        def setup(limited=limited):
+            limiter = sheets.RateLimiter(15 * 60, 15 * 60, burst=5, backoff_base=0.05, backoff_max=0.5) if limited \
+                else sheets.RateLimiter(float('inf'), float('inf'), burst=float('inf'), max_retries=0)
+            pool = fake_sheets.install(quota=(20, 1.0), limiter=limiter)
+            load_session(8, 18, 'filled')
+            return pool
+        def mixed(ops=ops):
+            store = storage.get_storage(); failed = 0
+            for i in range(ops):
+                try:
+                    if i % 3 == 2: store.save_hole(i % 18 + 1, 4, [4] * 8)
+                    else: store.load()
+                except Exception: failed += 1
+            return failed
+        yield 'limiter.mixed', params, setup, mixed
+
+# 4개 카트(스레드)가 같은 홀에서 자기 선수 점수만 100번씩 고쳐 저장. 끝난 뒤 각자 마지막 값이 남아 있는지(lost) 셈
+# 조정기가 없으면 세션이 본 행을 통째로 써서 남의 최근 값을 덮고, 있으면 칸 단위로 합쳐서 잃는 값이 없음
+def concurrent_cases(quick):
+    import threading
+    rounds = 30 if quick else 100
+    for coord in (False, True):
+        params = {'carts': 4, 'rounds': rounds, 'coordinator': coord}
+        def run_case(coord=coord):
+            pool = fake_sheets.install()
+            raw = storage.SheetsStorage()
+            writer = storage.BackgroundWriter(raw)
+            store = storage.WriteCoordinator(writer) if coord else writer
+            store.save_settings(4, 2, ['A', 'B', 'C', 'D'], [1, 1, 2, 2])
+            last = {}; conflicts = [0]
+            def cart(i, rng):
+                base = None
+                for _ in range(rounds):
+                    seen = base['scores'] if base else {}
+                    sc = [seen.get(j) or 4 for j in range(4)]; sc[i] = rng.choice([3, 5, 6, 7])
+                    rev, par, saved, bad = store.merge_hole(5, 4, sc, base)
+                    conflicts[0] += len(bad); base = {'par': par, 'scores': dict(enumerate(saved))}; last[i] = sc[i]
+            threads = [threading.Thread(target=cart, args=(i, random.Random(i))) for i in range(4)]
+            for t in threads: t.start()
+            for t in threads: t.join()
+            store.flush()
+            final = raw.load()[1][5]['scores']
+            return {'lost': sum(final.get(i) != v for i, v in last.items()), 'conflicts': conflicts[0], 'api_total': pool.api.total()}
+        yield 'update_scores.concurrent', params, run_case
+
+# 점수 입력 화면에서 선수 점수 하나를 바꿨을 때 다시 도는 비용 (AppTest, 화면 요소 직렬화 포함)
+# page: 예전처럼 페이지 전체가 다시 돎 / cart: 카트 조각 하나만 다시 돎 (조각이 실제로 다시 돌리는 부분만 실행)
+def score_page(app_dir, bench_dir, players, scope):
+    import sys
+    sys.path[:0] = [app_dir, bench_dir]
+    import streamlit as st
+    import fake_sheets
+    import views
+    if 'round' not in st.session_state:
+        fake_sheets.install()
+        from engine import RoundState
+        st.session_state.round = RoundState([f'P{i}' for i in range(players)], [1 + i // 4 for i in range(players)])
+        st.session_state.round.set_hole(1, 4, [4] * players)
+        st.session_state.game_info = {'current_hole': 1, 'par': 4, 'participants_count': players, 'cart_count': (players + 3) // 4}
+        st.session_state.step = 2; st.session_state.is_synced = True
+    if scope == 'page': views.show_score_screen()
+    else: views.show_cart_scores(1, 1, 4)
+
+def rerun_cases(quick):
+    from streamlit.testing.v1 import AppTest
+    for players in ((12,) if quick else (4, 12, 100)):
+        for scope in ('page', 'cart'):
+            params = {'players': players, 'scope': scope}
+            def setup(players=players, scope=scope):
+                at = AppTest.from_function(score_page, args=(APP_DIR, os.path.dirname(os.path.abspath(__file__)), players, scope), default_timeout=30)
+                at.run()
+                return at
+            def change(at, flip=[0]):
+                flip[0] ^= 1
+                at.selectbox(key='score_rel_1_0').select(flip[0]).run()
+            yield 'score_screen.rerun', params, setup, change
+
+# 내기 시뮬레이션: 핸디캡 5~30 을 고르게 나눈 n명, 표준 파72
+def simulate_cases(quick):
+    for n in ((4,) if quick else (4, 12)):
+        rounds = 20_000 if quick else 200_000
+        profiles = [simulate.handicap_profile(5 + 25 * i / max(1, n - 1)) for i in range(n)]
+        yield 'simulate', {'players': n, 'rounds': rounds}, lambda profiles=profiles, rounds=rounds: simulate.simulate(profiles, rounds=rounds, seed=0)
+
+# 세션 하나가 들고 있는 라운드 상태 메모리 (tracemalloc 으로 만든 객체가 차지한 바이트)
+# dicts: 예전 선수 dict + 파 dict + history / round: engine.RoundState
+def traced_bytes(build):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del obj
+    return size
+
+def memory_cases(quick):
+    for n in ((12,) if quick else (4, 12, 48, 100, 500)):
+        pars, scores = make_round(n, 18, 'filled')
+        for layout, build in (('dicts', make_legacy_state), ('round', make_state)):
+            yield 'session_state.memory', {'players': n, 'holes': 18, 'layout': layout}, lambda build=build, n=n, pars=pars, scores=scores: traced_bytes(lambda: build(n, 18, pars, scores))
+
+# --- 실행 ---
+def run(quick=False, latency=0.0):
+    results = []
+    def record(name, params, fn, pool=None):
+        r = {'name': name, 'params': params}
+        r.update(measure(fn, min_time=0.05 if quick else 0.2, max_reps=50 if latency else 2000))
+        if pool is not None:
+            r['api_calls'] = api_profile(pool, fn); r['api_total'] = sum(r['api_calls'].values())
+        results.append(r)
+        print(f"{name:32s} {json.dumps(params, ensure_ascii=False):60s} {r['us_median']:12.1f} us" + (f"  api={r['api_total']}" if pool else ''))
+    for name, params, setup, fn in core_cases(quick):
+        fake_sheets.install(0.0); setup(); record(name, params, fn)
+    for name, params, setup, fn in golfgame_cases(quick): record(name, params, fn)
+    for name, params, fn in simulate_cases(quick): record(name, params, fn)
+    for name, params, setup, fn, holder in sheet_cases(quick, latency):
+        setup(); record(name, params, fn, holder['pool'])
+    for name, params, setup, fn, holder in games_cases(quick, latency):
+        pool = setup(); record(name, params, fn, pool)
+        # 한 라운드가 건드린 시트 수 = 조 수 x 2 (설정/점수), 다른 조 시트를 읽거나 쓰지 않음
+        pool.api.reset(); fn()
+        results[-1]['sheets_touched'] = len(pool.api.touched)
+        print(f"{'':32s} sheets_touched={len(pool.api.touched)} (games x 3 = {params['games'] * 3})")
+    for name, params, setup, fn in rerun_cases(quick):
+        at = setup(); record(name, params, lambda: fn(at))
+    for name, params, fn in memory_cases(quick):
+        t = time.perf_counter(); size = fn(); wall = time.perf_counter() - t
+        results.append({'name': name, 'params': params, 'us_median': wall * 1e6, 'us_min': wall * 1e6, 'reps': 1, 'bytes': size})
+        print(f"{name:32s} {json.dumps(params):60s} {size:10d} bytes")
+    for name, params, fn in concurrent_cases(quick):
+        t = time.perf_counter(); out = fn(); wall = time.perf_counter() - t
+        r = {'name': name, 'params': params, 'us_median': wall * 1e6, 'us_min': wall * 1e6, 'reps': 1}
+        r.update(out); results.append(r)
+        print(f"{name:32s} {json.dumps(params):60s} {wall * 1e3:10.1f} ms  lost={out['lost']} conflicts={out['conflicts']}")
+    # 제한기 케이스는 한 번만 돌리고 실패 건수와 제한기 지표를 같이 남김
+    for name, params, setup, fn in limiter_cases(quick):
+        pool = setup(); pool.api.reset()
+        t = time.perf_counter(); failed = fn(); wall = time.perf_counter() - t
+        r = {'name': name, 'params': params, 'us_median': wall * 1e6, 'us_min': wall * 1e6, 'reps': 1,
+             'failed': failed, 'rejected_429': pool.api.rejected, 'metrics': pool.limiter.metrics(), 'api_total': pool.api.total()}
+        results.append(r)
+        print(f"{name:32s} {json.dumps(params):60s} {wall * 1e3:10.1f} ms  failed={failed} 429={pool.api.rejected} {json.dumps(r['metrics'])}")
+    return results
+
+def case_key(r): return r['name'] + ' ' + json.dumps(r['params'], sort_keys=True)
+
+def git_rev():
+    try: return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    except Exception: return ''
+
+# 이전 리포트와 비교: API 호출 수는 하나라도 늘면 회귀, 시간은 최솟값이 tolerance 비율을 넘으면 회귀
+def compare(old, new, tolerance):
+    old_map = {case_key(r): r for r in old['results']}
+    regressions = []
+    for r in new['results']:
+        o = old_map.get(case_key(r))
+        if not o: continue
+        if r.get('api_total', 0) > o.get('api_total', 0):
+            regressions.append(f"API {case_key(r)}: {o.get('api_total', 0)} -> {r['api_total']}")
+        # 잡음이 적은 최솟값 기준
+        if r['us_min'] > o['us_min'] * (1 + tolerance) and r['us_min'] - o['us_min'] > 5:
+            regressions.append(f"CPU {case_key(r)}: {o['us_min']:.1f} -> {r['us_min']:.1f} us (min)")
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--out', help='JSON 리포트 저장 경로')
+    ap.add_argument('--compare', help='비교할 이전 리포트')
+    ap.add_argument('--tolerance', type=float, default=0.25)
+    ap.add_argument('--latency-ms', type=float, default=0.0, help='가짜 시트 API 호출마다 넣을 지연')
+    ap.add_argument('--quick', action='store_true')
+    args = ap.parse_args(argv)
+
+    report = {'meta': {'rev': git_rev(), 'python': platform.python_version(), 'machine': platform.machine(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+              'results': run(args.quick, args.latency_ms / 1000)}
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f: json.dump(report, f, ensure_ascii=False, indent=1)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f: old = json.load(f)
+        regressions = compare(old, report, args.tolerance)
+        for line in regressions: print('REGRESSION', line)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,400 @@
+import time
+import numpy as np
+
+# --- 상수 설정 (기본 규칙의 값) ---
+BASE_STAKE = 1000
+BAEPAN_MULTIPLIER = 1
+BONUS_AMOUNT = 2000
+
+# --- 하우스 룰: 배판 조건/배수/보너스를 데이터로 정의 ---
+# 조마다 다른 규칙을 코드 수정 없이 쓰도록 딕셔너리(설정 파일, JSON, 시트에서 읽은 값)로 적고 compile_rules 로 한 번 컴파일합니다.
+#   mode:       타당 정산 방식 (SETTLE_MODES)
+#   base_stake: 1타 차이당 금액
+#   multiplier: 배판인 홀의 타당 금액 배수
+#   bonus:      {'amount': 금액, 'diff_max': -1} -> 파 대비 diff_max 이하인 선수가 나머지 한 명마다 받는 금액
+#   baepan:     배판 조건 목록 (하나라도 맞으면 배판, 사유는 이 순서)
+#     {'reason': 이름, 'diff_min': a, 'diff_max': b, 'count_min': k, 'par': [3]}
+#         파 대비 점수가 a 이상 b 이하인 선수가 k명(기본 1) 이상. par 를 주면 그 파의 홀에서만
+#     {'reason': 이름, 'tie_over': 0.5}
+#         같은 점수인 선수가 전체 인원의 tie_over 배보다 많음
+#     reason 안의 {count} 는 가장 많이 겹친 점수의 인원 수로 바뀜 (예: '동타 인원 과반({count}명)')
+# 빠진 항목은 기본 규칙 값을 씁니다.
+# 타당 정산 방식
+#   'pairwise': 모든 두 사람이 타수 차이만큼 주고받음, 배판이면 배수 (golf_battle_V02 앱)
+#   'winners':  배판일 때만 최저타(공동이면 모두)가 나머지 각자에게서 타수 차이만큼 받음 (golf_battle_v02.py)
+SETTLE_MODES = ('pairwise', 'winners')
+
+DEFAULT_RULES = {
+    'name': '기본',
+    'mode': 'pairwise',
+    'base_stake': BASE_STAKE,
+    'multiplier': BAEPAN_MULTIPLIER,
+    'bonus': {'amount': BONUS_AMOUNT, 'diff_max': -1},
+    'baepan': [
+        {'reason': '언더파', 'diff_max': -1},
+        {'reason': '트리플보기+', 'diff_min': 3},
+        {'reason': '파3 더블+', 'diff_min': 2, 'par': [3]},
+        {'reason': '과반수 동타', 'tie_over': 0.5},
+    ],
+}
+# golf_battle_v02.py (GolfGame) 규칙: 승자 배판, 사유 이름은 그 앱의 표기
+WINNERS_RULES = dict(DEFAULT_RULES, name='승자 배판', mode='winners', baepan=[
+    {'reason': '언더파 발생', 'diff_max': -1},
+    {'reason': '트리플보기 이상', 'diff_min': 3},
+    {'reason': '파3 더블보기 이상', 'diff_min': 2, 'par': [3]},
+    {'reason': '동타 인원 과반({count}명)', 'tie_over': 0.5},
+])
+RULE_KEYS = {'reason', 'diff_min', 'diff_max', 'count_min', 'par', 'tie_over'}
+NO_LIMIT = 1 << 30
+
+# 사유 이름의 {count} 채우기 (가장 많이 겹친 점수의 인원 수)
+def format_reasons(reasons, scores):
+    if not any('{count}' in r for r in reasons): return reasons
+    top = str(max(map(scores.count, set(scores)))) if scores else '0'
+    return [r.replace('{count}', top) for r in reasons]
+
+# 조건 하나 -> (행렬 판정, 한 홀 판정)
+#   행렬 판정: scores (..., 선수, 홀), diff = scores - pars, pars (..., 홀) -> (..., 홀) bool
+#   한 홀 판정: (점수 리스트, 파, 인원, 최저, 최고) -> bool. 최저/최고는 RuleSet.check 가 한 번만 구해서 넘김
+def compile_condition(rule):
+    unknown = set(rule) - RULE_KEYS
+    if unknown: raise ValueError(f"알 수 없는 배판 조건 항목: {', '.join(sorted(unknown))}")
+    if 'tie_over' in rule:
+        frac = float(rule['tie_over'])
+        def test(scores, diff, pars):
+            n = scores.shape[-2]
+            if not n: return np.zeros(scores.shape[:-2] + scores.shape[-1:], dtype=bool)
+            if frac >= 0.5:
+                # 절반 넘게 나온 점수가 있다면 반드시 정렬했을 때 가운데 값
+                mid = np.take(np.partition(scores, n // 2, axis=-2), [n // 2], axis=-2)
+                top = (scores == mid).sum(axis=-2)
+            else: top = np.max([(scores == v).sum(axis=-2) for v in np.unique(scores)], axis=0)
+            return top > n * frac
+        def check(scores, par, n, mn, mx):
+            if frac >= 0.5: top = scores.count(sorted(scores)[len(scores) // 2])
+            else: top = max(map(scores.count, set(scores)))
+            return top > n * frac
+        return test, check
+    if 'diff_min' not in rule and 'diff_max' not in rule: raise ValueError(f"배판 조건에 diff_min/diff_max 가 없습니다: {rule.get('reason')}")
+    lo = int(rule.get('diff_min', -NO_LIMIT)); hi = int(rule.get('diff_max', NO_LIMIT)); k = int(rule.get('count_min', 1))
+    only = rule.get('par')
+    only = None if only is None else tuple(int(p) for p in (only if isinstance(only, (list, tuple)) else [only]))
+    # 한쪽만 막힌 범위는 비교 한 번으로 (np.isin 은 작은 배열에서 느려서 파 비교도 직접)
+    def test(scores, diff, pars):
+        if lo == -NO_LIMIT: hit = diff <= hi
+        elif hi == NO_LIMIT: hit = diff >= lo
+        else: hit = (diff >= lo) & (diff <= hi)
+        hit = hit.any(axis=-2) if k == 1 else hit.sum(axis=-2) >= k
+        if not only: return hit
+        return hit & (pars == only[0] if len(only) == 1 else (pars[..., None] == np.array(only)).any(axis=-1))
+    def check(scores, par, n, mn, mx):
+        if only and par not in only: return False
+        a, b = par + lo, par + hi
+        if k == 1:
+            if lo == -NO_LIMIT: return mn <= b
+            if hi == NO_LIMIT: return mx >= a
+            return any(a <= s <= b for s in scores)
+        return sum(1 for s in scores if a <= s <= b) >= k
+    return test, check
+
+# 컴파일된 규칙 세트. 라운드 전체(여러 라운드 묶음도)를 한 번에 판정/정산하거나 한 홀만 볼 수 있음
+class RuleSet:
+    __slots__ = ('spec', 'name', 'mode', 'base_stake', 'multiplier', 'bonus_amount', 'bonus_max', 'reasons', 'tests', 'checks')
+
+    def __init__(self, spec):
+        self.spec = dict(spec)  # 원본 설정 (다른 프로세스로 넘길 때 다시 컴파일용)
+        get = lambda k: spec.get(k, DEFAULT_RULES[k])
+        self.name = str(get('name'))
+        self.mode = str(get('mode'))
+        if self.mode not in SETTLE_MODES: raise ValueError(f"알 수 없는 정산 방식: {self.mode} ({', '.join(SETTLE_MODES)})")
+        self.base_stake = int(get('base_stake')); self.multiplier = int(get('multiplier'))
+        bonus = get('bonus')
+        self.bonus_amount = int(bonus.get('amount', BONUS_AMOUNT)); self.bonus_max = int(bonus.get('diff_max', -1))
+        conditions = list(get('baepan'))
+        self.reasons = [str(c.get('reason', f'조건{i+1}')) for i, c in enumerate(conditions)]
+        compiled = [compile_condition(c) for c in conditions]
+        self.tests = [t for t, _ in compiled]; self.checks = [c for _, c in compiled]
+
+    # (조건 수, ..., 홀) 사유별 배판 마스크
+    def masks(self, scores, pars):
+        scores = np.asarray(scores); pars = np.asarray(pars)
+        diff = scores - pars[..., None, :]
+        if not self.tests: return np.zeros((0,) + scores.shape[:-2] + scores.shape[-1:], dtype=bool)
+        return np.stack([t(scores, diff, pars) for t in self.tests])
+
+    # 한 홀: (배판 여부, 사유 목록)
+    def check(self, scores, par, num_players=None):
+        if not len(scores): return False, []
+        n = len(scores) if num_players is None else num_players
+        mn, mx = min(scores), max(scores)
+        reasons = [r for r, c in zip(self.reasons, self.checks) if c(scores, par, n, mn, mx)]
+        return bool(reasons), format_reasons(reasons, scores)
+
+    # 한 홀의 정산: 선수별 타당정산/보너스 금액과 배판 여부
+    def settle_hole(self, scores, par):
+        n = len(scores)
+        is_baepan, reasons = self.check(scores, par, n)
+        total = sum(scores)
+        if self.mode == 'winners':
+            # 승자는 나머지 전원의 (점수 - 최저타) 합, 나머지는 승자 수 x 자기 타수 차이를 냄
+            stake = self.base_stake * self.multiplier if is_baepan else 0
+            lo = min(scores) if scores else 0
+            w = scores.count(lo)
+            m_str = [(total - n*lo) * stake if s == lo else -w * (s - lo) * stake for s in scores]
+        else:
+            # 모든 쌍 (j - i) 합 = 전체합 - n * 내 점수, 보너스도 같은 방식의 닫힌 식
+            stake = self.base_stake * self.multiplier if is_baepan else self.base_stake
+            m_str = [(total - n*s) * stake for s in scores]
+        cut = par + self.bonus_max
+        under = [s <= cut for s in scores]
+        n_under = sum(under)
+        m_bon = [self.bonus_amount * (n*u - n_under) for u in under]
+        return m_str, m_bon, is_baepan, reasons
+
+    # 라운드 전체를 행렬로 한 번에
+    def settle(self, scores, pars):
+        scores = np.asarray(scores, dtype=np.int64); pars = np.asarray(pars, dtype=np.int64)
+        n = scores.shape[-2]
+        reasons = self.masks(scores, pars)
+        stroke = self.stroke_money(scores, reasons.any(axis=0))
+        under = (scores - pars[..., None, :] <= self.bonus_max).astype(np.int64)
+        bonus = self.bonus_amount * (n * under - under.sum(axis=-2, keepdims=True))
+        return RoundSettlement(reasons, stroke, bonus, scores.any(axis=-2), self.reasons, scores)
+
+    # 홀별 타당 정산 (..., 선수, 홀). baepan 은 (..., 홀) 배판 여부
+    def stroke_money(self, scores, baepan):
+        n = scores.shape[-2]
+        total = scores.sum(axis=-2, keepdims=True)
+        if self.mode == 'pairwise':
+            stake = np.where(baepan, self.base_stake * self.multiplier, self.base_stake)[..., None, :]
+            return stake * (total - n * scores)
+        if not n: return np.zeros(scores.shape, dtype=np.int64)
+        stake = np.where(baepan, self.base_stake * self.multiplier, 0)[..., None, :]
+        lo = scores.min(axis=-2, keepdims=True)
+        win = scores == lo
+        return stake * np.where(win, total - n * lo, -win.sum(axis=-2, keepdims=True) * (scores - lo))
+
+    # 라운드별 선수 손익 합계 (..., 선수)와 배판 마스크 (..., 홀). 홀별 표가 필요 없는 시뮬레이션용
+    def totals(self, scores, pars):
+        # 점수 비교는 int16 으로, 금액은 int64 로 (큰 배열을 int64 로 여러 번 만들지 않게)
+        scores = np.asarray(scores, dtype=np.int16); pars = np.asarray(pars, dtype=np.int16)
+        n = scores.shape[-2]
+        baepan = self.masks(scores, pars).any(axis=0)
+        if self.mode == 'pairwise':
+            stake = np.where(baepan, self.base_stake * self.multiplier, self.base_stake).astype(np.int64)
+            # 선수 i 의 타당 합 = sum_h stake_h * (홀 합_h - n * s_ih)
+            stroke = (stake * scores.sum(axis=-2, dtype=np.int64)).sum(axis=-1)[..., None] - n * np.einsum('...ih,...h->...i', scores.astype(np.int64), stake)
+        else: stroke = self.stroke_money(scores.astype(np.int64), baepan).sum(axis=-1)
+        under = (scores - pars[..., None, :] <= self.bonus_max).sum(axis=-1)
+        bonus = self.bonus_amount * (n * under - under.sum(axis=-1, keepdims=True))
+        return stroke + bonus, baepan
+
+def compile_rules(spec=None): return RuleSet(spec or {})
+
+DEFAULT_RULESET = compile_rules(DEFAULT_RULES)
+WINNERS_RULESET = compile_rules(WINNERS_RULES)
+BAEPAN_REASONS = DEFAULT_RULESET.reasons
+
+# --- 배판 판정 / 한 홀 정산 (rules 를 안 주면 기본 규칙) ---
+def check_baepan(scores, par, num_players, rules=None):
+    return (rules or DEFAULT_RULESET).check(scores, par, num_players)
+
+def settle_hole(scores, par, rules=None):
+    return (rules or DEFAULT_RULESET).settle_hole(scores, par)
+
+# --- 라운드 전체 정산 결과 ---
+# 배열 모양: scores (..., 선수, 홀), pars (..., 홀). 앞쪽 차원은 여러 라운드를 한 번에 돌릴 때 씁니다.
+class RoundSettlement:
+    __slots__ = ('reasons', 'baepan', 'stroke', 'bonus', 'total', 'played', 'cumulative', 'names', 'scores')
+
+    def __init__(self, reasons, stroke, bonus, played, names=BAEPAN_REASONS, scores=None):
+        self.reasons = reasons                      # (조건 수, ..., 홀) 사유별 배판 마스크
+        self.baepan = reasons.any(axis=0)           # (..., 홀)
+        self.stroke = stroke                        # (..., 선수, 홀) 타당정산
+        self.bonus = bonus                          # (..., 선수, 홀) 언더파 보너스
+        self.total = stroke + bonus
+        self.played = played                        # (..., 홀) 점수가 하나라도 있는 홀
+        self.cumulative = np.cumsum(self.total * played[..., None, :], axis=-1)
+        self.names = names                          # 조건별 사유 이름
+        self.scores = scores                        # (..., 선수, 홀) 사유의 {count} 를 채울 때만 씀
+
+    # 단일 라운드에서 h 번째 열의 사유 목록 (check_baepan 반환 형식)
+    def hole_reasons(self, h):
+        reasons = [r for r, m in zip(self.names, self.reasons[:, h]) if m]
+        return format_reasons(reasons, self.scores[:, h].tolist()) if self.scores is not None else reasons
+
+def baepan_masks(scores, pars, rules=None):
+    return (rules or DEFAULT_RULESET).masks(scores, pars)
+
+def settle_round(scores, pars, rules=None):
+    return (rules or DEFAULT_RULESET).settle(scores, pars)
+
+# --- 라운드 상태 (세션마다 하나) ---
+# 선수 x 홀 점수 배열(int16, 0 = 미입력), 홀별 파(int16, 0 = 미저장), 이름/카트 표.
+# 홀 번호는 1부터 (배열 열은 hole - 1). 18홀 밖의 홀은 무시합니다 (Ledger 와 같음).
+MAX_HOLES = 18
+DEFAULT_PAR = 4
+MAX_STROKES = int(np.iinfo(np.int16).max)  # 저장소에서 읽은 이보다 큰 값(또는 0 이하)은 미입력으로 봄
+
+class RoundState:
+    __slots__ = ('names', 'carts', 'scores', 'pars')
+
+    def __init__(self, names=(), carts=None):
+        self.names = tuple(names)
+        n = len(self.names)
+        self.carts = np.array(list(carts)[:n] if carts is not None else [1]*n, dtype=np.int16)
+        self.scores = np.zeros((n, MAX_HOLES), dtype=np.int16)
+        self.pars = np.zeros(MAX_HOLES, dtype=np.int16)
+
+    def __len__(self): return len(self.names)
+
+    # 인원/이름/카트를 바꾼 새 상태 (남는 선수의 점수와 파는 그대로)
+    def with_players(self, names, carts):
+        new = RoundState(names, carts)
+        k = min(len(self), len(new))
+        new.scores[:k] = self.scores[:k]; new.pars[:] = self.pars
+        return new
+
+    def cart(self, i): return int(self.carts[i])
+    def cart_ids(self): return sorted(set(self.carts.tolist()))
+    def cart_players(self, cid): return np.flatnonzero(self.carts == cid).tolist()
+
+    def score(self, i, hole_num):
+        return int(self.scores[i, hole_num - 1]) if 1 <= hole_num <= MAX_HOLES else 0
+
+    def hole_scores(self, hole_num):
+        return self.scores[:, hole_num - 1].tolist() if 1 <= hole_num <= MAX_HOLES else [0]*len(self)
+
+    # 저장된 파 (없으면 None) / 화면과 정산에 쓰는 파 (없으면 4)
+    def saved_par(self, hole_num):
+        return int(self.pars[hole_num - 1]) or None if 1 <= hole_num <= MAX_HOLES else None
+
+    def par(self, hole_num): return self.saved_par(hole_num) or DEFAULT_PAR
+
+    # 한 홀의 파(None 이면 그대로)와 점수 리스트(앞에서부터, None/0 은 미입력)
+    def set_hole(self, hole_num, par, scores):
+        if not 1 <= hole_num <= MAX_HOLES: return
+        if par is not None: self.pars[hole_num - 1] = par
+        for i, s in enumerate(list(scores)[:len(self)]): self.scores[i, hole_num - 1] = s or 0
+
+    # 저장소 기록 {'par', 'scores': {선수: 점수}} 반영. replace 면 기록에 없는 칸은 비우고, rec 이 None 이면 홀을 지움
+    # 시트에서 손으로 고친 값이 배열 범위를 넘으면 그 칸은 미입력으로 둠
+    def apply_record(self, hole_num, rec, replace=False):
+        if not 1 <= hole_num <= MAX_HOLES: return
+        col = hole_num - 1
+        if rec is None:
+            self.pars[col] = 0; self.scores[:, col] = 0
+            return
+        if rec['par'] is not None and 0 < rec['par'] <= MAX_STROKES: self.pars[col] = rec['par']
+        if replace: self.scores[:, col] = 0
+        for i, s in rec['scores'].items():
+            if 0 <= i < len(self): self.scores[i, col] = s if 0 < s <= MAX_STROKES else 0
+
+    # 정산용 (선수, 홀) 점수와 파 (저장 안 된 파는 4)
+    def settle_arrays(self):
+        return self.scores, np.where(self.pars == 0, DEFAULT_PAR, self.pars).astype(np.int64)
+
+    def nbytes(self):
+        return self.scores.nbytes + self.pars.nbytes + self.carts.nbytes + sum(len(n.encode()) for n in self.names)
+
+# --- 누적 정산 장부 ---
+# 홀별 정산액(델타)과 선수별 누적 잔액을 같이 들고 있다가, 한 홀이 바뀌면 그 홀 몫만 빼고 다시 더합니다.
+class Ledger:
+    def __init__(self, names, rules=None):
+        self.names = list(names)
+        self.rules = rules or DEFAULT_RULESET
+        self.holes = {}  # hole -> (par, scores, 홀 합계 리스트)
+        self.balance = [0]*len(self.names)
+
+    def set_hole(self, hole_num, par, scores):
+        if not 1 <= hole_num <= 18: return
+        scores = tuple(scores)
+        old = self.holes.get(hole_num)
+        if old and old[0] == par and old[1] == scores: return
+        if old:
+            for i, v in enumerate(old[2]): self.balance[i] -= v
+            del self.holes[hole_num]
+        # 점수가 하나도 없는 홀은 누적에서 제외
+        if not any(scores): return
+        m_str, m_bon, _, _ = self.rules.settle_hole(scores, par)
+        delta = [a + b for a, b in zip(m_str, m_bon)]
+        for i, v in enumerate(delta): self.balance[i] += v
+        self.holes[hole_num] = (par, scores, delta)
+
+    # 라운드 전체를 행렬로 한 번에 정산해서 채우기
+    def load_round(self, scores, pars):
+        scores = np.asarray(scores, dtype=np.int64).reshape(len(self.names), len(pars))
+        res = self.rules.settle(scores, pars)
+        for c in range(len(pars)):
+            if not res.played[c]: continue
+            delta = res.total[:, c].tolist()
+            self.holes[c + 1] = (int(pars[c]), tuple(int(v) for v in scores[:, c]), delta)
+        self.balance = res.cumulative[:, -1].tolist() if len(pars) else [0]*len(self.names)
+
+    # 이름 기준 누적 (동명이인은 합산, 기존 표와 동일)
+    def totals(self):
+        tot = {n: 0 for n in self.names}
+        for n, v in zip(self.names, self.balance): tot[n] += v
+        return tot
+
+# --- 송금 내역 최소화 ---
+# 잔액 리스트(합계 0)를 받아 (보내는 idx, 받는 idx, 금액) 목록을 돌려줍니다.
+EXACT_TRANSFER_LIMIT = 20      # 이 인원(잔액이 0이 아닌 사람)까지는 정확히 최소 건수를 구함
+TRANSFER_TIME_BUDGET = 0.05    # 초, 넘으면 그리디로 대체
+
+# 큰 금액부터 보내는 사람-받는 사람을 짝지어 주는 기존 방식
+def greedy_transfers(balances, idx=None):
+    idx = range(len(balances)) if idx is None else idx
+    snd = sorted([[i, -balances[i]] for i in idx if balances[i] < 0], key=lambda x: x[1], reverse=True)
+    rcv = sorted([[i, balances[i]] for i in idx if balances[i] > 0], key=lambda x: x[1], reverse=True)
+    res = []; s = 0; r = 0
+    while s < len(snd) and r < len(rcv):
+        amt = min(snd[s][1], rcv[r][1])
+        if amt > 0: res.append((snd[s][0], rcv[r][0], amt))
+        snd[s][1] -= amt; rcv[r][1] -= amt
+        if snd[s][1] == 0: s += 1
+        if rcv[r][1] == 0: r += 1
+    return res
+
+# 합이 0인 부분집합으로 최대한 많이 나누기 (비트마스크 DP, 인원수 단위로 벡터화)
+# 그룹 k개로 나누면 송금은 (인원 - k)건이 최소입니다. 시간 초과면 None.
+def zero_sum_groups(amounts, deadline=None):
+    n = len(amounts); size = 1 << n
+    sums = np.zeros(size, dtype=np.int64); pop = np.zeros(size, dtype=np.int8)
+    for i in range(n):
+        sums[1 << i:2 << i] = sums[:1 << i] + amounts[i]
+        pop[1 << i:2 << i] = pop[:1 << i] + 1
+    zero = (sums == 0).astype(np.int16)
+    dp = np.zeros(size, dtype=np.int16)
+    for k in range(1, n + 1):
+        m = np.flatnonzero(pop == k)
+        best = np.full(len(m), -1, dtype=np.int16)
+        for i in range(n):
+            if deadline is not None and time.perf_counter() > deadline: return None
+            has = (m >> i) & 1 == 1
+            best[has] = np.maximum(best[has], dp[m[has] ^ (1 << i)])
+        dp[m] = best + zero[m]
+    # 최적 경로를 따라 내려가며 0 이 되는 지점마다 그룹을 끊음
+    groups = []; cur = []; mask = size - 1
+    while mask:
+        for i in range(n):
+            if mask >> i & 1 and dp[mask ^ (1 << i)] + zero[mask] == dp[mask]:
+                mask ^= 1 << i; cur.append(i)
+                break
+        if zero[mask]: groups.append(cur); cur = []
+    return groups
+
+def min_transfers(balances, time_budget=TRANSFER_TIME_BUDGET):
+    deadline = time.perf_counter() + time_budget
+    left = [i for i, v in enumerate(balances) if v != 0]
+    # 금액이 정확히 상쇄되는 두 사람은 따로 한 건으로 처리해도 최적이 유지됨
+    res = []; pending = {}
+    for i in left:
+        partners = pending.get(-balances[i])
+        if partners: res.extend(greedy_transfers(balances, [partners.pop(), i]))
+        else: pending.setdefault(balances[i], []).append(i)
+    left = sorted(i for ids in pending.values() for i in ids)
+    groups = zero_sum_groups([balances[i] for i in left], deadline) if len(left) <= EXACT_TRANSFER_LIMIT else None
+    if groups is None: return res + greedy_transfers(balances, left)
+    for g in groups: res.extend(greedy_transfers(balances, [left[i] for i in g]))
+    return res
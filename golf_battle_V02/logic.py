@@ -1,202 +1,228 @@
 import streamlit as st
-import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import json
-from collections import Counter
+import storage
+import simulate
+from engine import BASE_STAKE, BAEPAN_MULTIPLIER, BONUS_AMOUNT, DEFAULT_RULESET, compile_rules, Ledger, RoundState, min_transfers
 
-# --- 상수 설정 ---
-BASE_STAKE = 1000
-BAEPAN_MULTIPLIER = 1
-BONUS_AMOUNT = 2000
+# --- 하우스 룰 (.streamlit/secrets.toml 의 [rules], 없으면 기본 규칙) ---
+# 형식은 engine.DEFAULT_RULES 참고. 같은 설정이면 프로세스 공용으로 한 번만 컴파일합니다.
+@st.cache_resource(show_spinner=False)
+def _compiled_rules(spec_json): return compile_rules(json.loads(spec_json))
 
-# --- 구글 시트 연결 ---
-def connect_to_sheet():
-    try:
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
-        sheet_url = st.secrets["sheets"]["url"]
-        return client.open_by_url(sheet_url)
-    except Exception as e:
-        st.error(f"❌ 구글 시트 연결 실패: {e}")
-        return None
+def get_rules():
+    try: spec = st.secrets.get("rules")
+    except Exception: spec = None
+    if not spec: return DEFAULT_RULESET
+    try: return _compiled_rules(json.dumps(spec, default=dict, ensure_ascii=False, sort_keys=True))
+    except (ValueError, TypeError) as e:
+        st.error(f"하우스 룰 설정 오류, 기본 규칙을 씁니다: {e}")
+        return DEFAULT_RULESET
 
-# --- 헤더 강제 복구 (안전장치) ---
-def ensure_headers(ws, header_list):
-    try:
-        first_row = ws.row_values(1)
-        if not first_row:
-            ws.append_row(header_list)
-            return
-        
-        # 첫 줄이 데이터라면 헤더 삽입
-        expected = header_list[0]
-        current = str(first_row[0]).strip()
-        if current != expected:
-            ws.insert_row(header_list, index=1)
-    except: pass
-
-# --- 시트 초기화 ---
-def init_sheets(wb):
-    try: wb.worksheet('Settings')
-    except: wb.add_worksheet('Settings', 10, 30)
-    try: wb.worksheet('Scores')
-    except: wb.add_worksheet('Scores', 50, 20)
+# --- 게임 (조) 선택 ---
+# 세션마다 게임 코드 하나에 참가하고, 읽기/쓰기는 그 게임의 저장소(storage.get_storage(코드))로만 갑니다.
+# 코드는 주소(?game=코드)에도 남겨서 새로고침하거나 링크를 공유해도 같은 게임으로 들어옵니다.
+def game_id(): return st.session_state.get('game_id', storage.DEFAULT_GAME)
+
+def get_store(): return storage.get_storage(game_id())
+
+# 코드로 게임 참가 (없는 게임이면 처음 저장할 때 만들어짐). 코드가 잘못되면 False
+def join_game(code):
+    code = storage.normalize_game_code(code)
+    if code is None:
+        st.error("게임 코드는 영문/숫자 3~12자입니다")
+        return False
+    st.session_state.game_id = code
+    st.query_params['game'] = code
+    clear_game_state()
+    st.session_state.pop('is_synced', None)
+    init_session_state()
+    return True
+
+def new_game(): return join_game(storage.new_game_code())
 
 # --- 데이터 동기화 (Load) ---
+# 실제 저장 위치(구글 시트 / SQLite)는 storage.get_storage() 설정에 따름
+# 마지막으로 맞춘 리비전을 st.session_state.sync_revs 에 두고, 전체 리비전이 그대로면 바로 끝냅니다.
+# 설정이 바뀌었으면 전체를 다시 읽고, 홀만 바뀌었으면 그 홀 행만 읽어서 반영합니다.
 def sync_data():
-    wb = connect_to_sheet()
-    if not wb: return
-
-    # 1. Settings 로드
+    store = get_store()
+    known = st.session_state.get('sync_revs')
+    # 백그라운드로 밀린 저장을 먼저 끝내야 방금 입력한 점수가 옛 값으로 덮이지 않음
+    if not store.flush():
+        st.warning("저장 대기 중인 점수가 있어 동기화를 미뤘습니다. 잠시 후 다시 시도하세요.")
+        return
     try:
-        ws = wb.worksheet('Settings')
-        headers = ['participants_count', 'cart_count'] + [f'player_{i}' for i in range(12)] + [f'cart_{i}' for i in range(12)]
-        ensure_headers(ws, headers)
-        
-        rows = ws.get_all_values()
-        if len(rows) > 1:
-            header = rows[0]; data = rows[1]
-            settings_map = {k: v for k, v in zip(header, data)}
-            
-            if settings_map.get('participants_count'):
-                st.session_state.game_info['participants_count'] = int(settings_map['participants_count'])
-            if settings_map.get('cart_count'):
-                st.session_state.game_info['cart_count'] = int(settings_map['cart_count'])
-            
-            players = []
-            p_cnt = st.session_state.game_info.get('participants_count', 4)
-            for i in range(p_cnt):
-                p_name = settings_map.get(f"player_{i}", f"참가자{i+1}")
-                c_val = str(settings_map.get(f"cart_{i}", "1"))
-                players.append({'id': i, 'name': p_name, 'cart': int(c_val) if c_val.isdigit() else 1, 'scores': {}})
-            st.session_state.players = players
-    except: pass
-
-    # 2. Scores 로드
+        if known is not None:
+            revision = store.revision()
+            if revision is not None and revision == known['revision']: return
+            if revision is not None and sync_changed_holes(store, known, revision) is not None: return
+        settings_map, holes, revs = store.load()
+    except Exception as e:
+        st.error(f"동기화 오류: {e}")
+        invalidate_ledger()
+        return
+
+    apply_loaded(settings_map, holes, revs)
+
+# --- 실시간 갱신 (화면 조각이 몇 초마다 부름) ---
+# 전체 리비전 한 칸만 확인하고(공용 캐시가 있으면 TTL 동안 읽기 없음), 바뀌었을 때만 변경분을 읽습니다.
+# 오류는 화면에 띄우지 않고 다음 주기에 다시 확인. 밀린 저장이 있으면 flush 로 화면이 멈추지 않게 이번엔 건너뜀
+# 돌려주는 값: 바뀐 홀 목록 (없으면 빈 목록), 설정이 바뀌어 전체를 다시 읽었으면 None
+LIVE_INTERVAL = 5
+
+def live_sync():
+    known = st.session_state.get('sync_revs')
+    if known is None: return []
     try:
-        ws = wb.worksheet('Scores')
-        headers_sco = ['hole', 'par'] + [f'p{i}' for i in range(12)]
-        ensure_headers(ws, headers_sco)
-        
-        rows = ws.get_all_values()
-        if len(rows) > 1:
-            header = rows[0]
-            p_indices = {}; hole_idx = -1; par_idx = -1
-            for idx, col in enumerate(header):
-                if col == 'hole': hole_idx = idx
-                if col == 'par': par_idx = idx
-                if col.startswith('p') and col[1:].isdigit(): p_indices[int(col[1:])] = idx
-            
-            if hole_idx != -1:
-                for row in rows[1:]:
-                    if len(row) <= hole_idx or not row[hole_idx]: continue
-                    try: h = int(row[hole_idx])
-                    except: continue
-                    
-                    if par_idx != -1 and len(row) > par_idx:
-                        try: st.session_state.game_info['pars'][h] = int(row[par_idx])
-                        except: pass
-
-                    for p_idx in range(len(st.session_state.players)):
-                        if p_idx in p_indices and p_indices[p_idx] < len(row):
-                            val = row[p_indices[p_idx]]
-                            if val and str(val).strip():
-                                try: st.session_state.players[p_idx]['scores'][h] = int(val)
-                                except: pass
-        
-        # 화면 갱신용 키 삭제
-        keys_to_drop = [k for k in st.session_state.keys() if k.startswith("score_rel_") or k.startswith("par_select_")]
-        for k in keys_to_drop: del st.session_state[k]
-            
-    except Exception as e: st.error(f"동기화 오류: {e}")
+        store = get_store()
+        if store.write_status()['pending']: return []
+        revision = store.revision()
+        if revision is None or revision == known['revision']: return []
+        changed = sync_changed_holes(store, known, revision)
+        if changed is not None: return changed
+        apply_loaded(*store.load())
+    except Exception: return []
+    return None
+
+# 읽어 온 전체 상태(설정/홀/리비전)를 세션에 반영
+def apply_loaded(settings_map, holes, revs):
+    # 1. Settings
+    if settings_map:
+        if settings_map.get('participants_count'):
+            st.session_state.game_info['participants_count'] = int(settings_map['participants_count'])
+        if settings_map.get('cart_count'):
+            st.session_state.game_info['cart_count'] = int(settings_map['cart_count'])
+
+        names, carts = [], []
+        p_cnt = st.session_state.game_info.get('participants_count', 4)
+        for i in range(p_cnt):
+            names.append(settings_map.get(f"player_{i}", f"참가자{i+1}"))
+            c_val = str(settings_map.get(f"cart_{i}", "1"))
+            carts.append(int(c_val) if c_val.isdigit() and 0 < int(c_val) <= MAX_CARTS else 1)
+        st.session_state.round = RoundState(names, carts)
+
+    # 2. Scores
+    rnd = st.session_state.round
+    for h, rec in holes.items(): rnd.apply_record(h, rec)
+
+    # 화면 갱신용 키 삭제
+    keys_to_drop = [k for k in st.session_state.keys() if k.startswith("score_rel_") or k.startswith("par_select_")]
+    for k in keys_to_drop: del st.session_state[k]
+    st.session_state.sync_revs = revs
+    st.session_state.base_rows = storage.copy_holes(holes)
+    invalidate_ledger()
+
+# 설정은 그대로이고 홀 행만 바뀐 경우: 바뀐 홀만 읽어서 덮어쓰고 그 홀 목록을 돌려줌. 설정이 바뀌었으면 None
+def sync_changed_holes(store, known, revision):
+    settings_rev, hole_revs = store.row_revisions()
+    if settings_rev != known['settings']: return None
+    changed = [h for h in set(hole_revs) | set(known['holes']) if hole_revs.get(h) != known['holes'].get(h)]
+    holes = store.load_holes(changed)
+
+    rnd = st.session_state.round
+    for h in changed:
+        rec = holes.get(h)
+        shown = {'par': rnd.saved_par(h), 'scores': dict(enumerate(rnd.hole_scores(h)))}
+        rnd.apply_record(h, rec, replace=True)
+        set_base_row(h, rec)
+        drop_hole_widgets(h, shown)
+        refresh_ledger_hole(h)
+
+    known['revision'] = revision; known['holes'] = hole_revs
+    return changed
+
+# 바뀐 홀의 입력창만 다시 그림
+# shown(바뀌기 전 화면 기본값의 근거, {'par', 'scores'})을 주면 사용자가 이미 손댄 입력창은 남겨 둠 (저장 전 입력 보존)
+def drop_hole_widgets(hole_num, shown=None):
+    prefix = f"score_rel_{hole_num}_"; par_key = f"par_select_{hole_num}"
+    par = st.session_state.get(par_key)
+    for k in [k for k in st.session_state.keys() if k.startswith(prefix) or k == par_key]:
+        if shown is not None and par is not None:
+            if k == par_key: default = shown['par'] or 4
+            else:
+                saved = shown['scores'].get(int(k[len(prefix):])) or 0
+                default = saved - par if saved and -3 <= saved - par <= 6 else 0
+            if st.session_state[k] != default: continue
+        del st.session_state[k]
+
+# 이 세션이 마지막으로 본 저장된 홀 행 (저장 때 칸 단위 비교 기준). rec 이 None 이면 지워진 홀
+def set_base_row(hole_num, rec):
+    rows = st.session_state.setdefault('base_rows', {})
+    if rec is None: rows.pop(hole_num, None)
+    else: rows[hole_num] = {'par': rec['par'], 'scores': dict(rec['scores'])}
 
 # --- 저장 (Settings) ---
+# 인원/카트 수 상한 (시트의 홀별 선수 블록 크기, 카트는 4인 1카트 기준)
+MAX_PLAYERS = storage.MAX_PLAYERS
+MAX_CARTS = (MAX_PLAYERS + 3) // 4
+
 def save_setup_data(num_participants, num_carts, names, carts):
     st.session_state.game_info['participants_count'] = num_participants
     st.session_state.game_info['cart_count'] = num_carts
-    new_players = []
-    for i in range(num_participants):
-        saved = st.session_state.players[i]['scores'] if i < len(st.session_state.players) else {}
-        new_players.append({'id': i, 'name': names[i], 'cart': carts[i], 'scores': saved})
-    st.session_state.players = new_players
-
-    wb = connect_to_sheet()
-    if wb:
-        try: ws = wb.worksheet('Settings')
-        except: init_sheets(wb); ws = wb.worksheet('Settings')
-        
-        headers = ['participants_count', 'cart_count'] + [f'player_{i}' for i in range(12)] + [f'cart_{i}' for i in range(12)]
-        ensure_headers(ws, headers)
-            
-        data = [num_participants, num_carts] + names + [""]*(12-len(names)) + carts + [""]*(12-len(carts))
-        try:
-            cell_list = ws.range('A2:AZ2')
-            for i, v in enumerate(data): 
-                if i < len(cell_list): cell_list[i].value = v
-            ws.update_cells(cell_list)
-            st.toast("설정 저장 완료")
-        except: pass
+    st.session_state.round = st.session_state.round.with_players(names[:num_participants], carts[:num_participants])
+    invalidate_ledger()
+
+    try:
+        store = get_store()
+        rev = store.save_settings(num_participants, num_carts, names, carts)
+        if st.session_state.get('sync_revs') is not None: st.session_state.sync_revs['settings'] = rev
+        st.toast("설정 저장 중…" if store.write_status()['pending'] else "설정 저장 완료")
+    except Exception as e: st.error(f"설정 저장 실패: {e}")
 
 # --- 저장 (Scores) ---
+# 칸 단위로 합쳐 저장 (storage.WriteCoordinator): 다른 카트가 같은 홀의 다른 선수를 먼저 저장했으면
+# 그 값이 합쳐진 행이 돌아오고, 세션이 본 뒤 남이 먼저 고친 칸은 그대로 두고 알려 줌
 def update_scores(hole_num, par, scores_list):
     st.session_state.game_info['current_hole'] = hole_num
+    set_hole_values(hole_num, par, scores_list)
+
+    try:
+        store = get_store()
+        base = st.session_state.get('base_rows', {}).get(hole_num)
+        rev, saved_par, saved, conflicts = store.merge_hole(hole_num, par, scores_list, base)
+        set_base_row(hole_num, {'par': saved_par, 'scores': dict(enumerate(saved))})
+        if saved_par != par or saved != list(scores_list):
+            set_hole_values(hole_num, saved_par, saved)
+            drop_hole_widgets(hole_num)
+        # 내 저장은 다음 동기화 때 다시 읽지 않도록 행 리비전만 맞춰 둠 (전체 리비전은 그대로 둬야 남의 변경을 놓치지 않음)
+        if st.session_state.get('sync_revs') is not None: st.session_state.sync_revs['holes'][hole_num] = rev
+        if conflicts:
+            names = ["파" if c == 'par' else st.session_state.round.names[c] for c in conflicts]
+            st.toast(f"{hole_num}번 홀: 다른 카트가 먼저 바꾼 값은 그대로 두었습니다 ({', '.join(names)})", icon="⚠️")
+        st.toast(f"{hole_num}번 홀 저장 중…" if store.write_status()['pending'] else f"{hole_num}번 홀 저장 완료")
+    except Exception as e: st.error(f"저장 실패: {e}")
+
+def set_hole_values(hole_num, par, scores_list):
     st.session_state.game_info['par'] = par
-    st.session_state.game_info['pars'][hole_num] = par
-    for i, s in enumerate(scores_list): st.session_state.players[i]['scores'][hole_num] = s
-
-    wb = connect_to_sheet()
-    if wb:
-        try: ws = wb.worksheet('Scores')
-        except: init_sheets(wb); ws = wb.worksheet('Scores')
-        
-        headers_sco = ['hole', 'par'] + [f'p{i}' for i in range(12)]
-        ensure_headers(ws, headers_sco)
-        
-        try:
-            all_vals = ws.get_all_values()
-            row_idx = -1
-            for i, r in enumerate(all_vals):
-                if i == 0: continue 
-                if len(r) > 0 and str(r[0]) == str(hole_num): row_idx = i + 1; break
-            
-            data = [hole_num, par] + scores_list
-            if row_idx > 0:
-                cells = ws.range(f'A{row_idx}:Z{row_idx}')
-                for i, v in enumerate(data): 
-                    if i < len(cells): cells[i].value = v
-                ws.update_cells(cells)
-            else: ws.append_row(data)
-            st.toast(f"{hole_num}번 홀 저장 완료")
-        except Exception as e: st.error(f"저장 실패: {e}")
+    st.session_state.round.set_hole(hole_num, par, scores_list)
+    refresh_ledger_hole(hole_num)
+
+# 백그라운드 저장 상태 {'pending': 대기 건수, 'error': 마지막 실패 메시지 또는 None}
+def write_status():
+    try: return get_store().write_status()
+    except Exception: return {'pending': 0, 'error': None}
+
+# 시트 API 호출 지표 (호출/대기/재시도 횟수, 지연 백분위). 시트를 안 쓰면 None
+def api_metrics():
+    try: return storage.sheets.get_pool().limiter.metrics()
+    except Exception: return None
 
 # --- [핵심 수정] 리셋 기능 (입력창 초기화 포함) ---
 def reset_all_data():
-    wb = connect_to_sheet()
-    if wb:
-        # Settings & Scores 시트 데이터만 삭제 (헤더 유지)
-        try:
-            ws = wb.worksheet('Settings')
-            headers = ['participants_count', 'cart_count'] + [f'player_{i}' for i in range(12)] + [f'cart_{i}' for i in range(12)]
-            ensure_headers(ws, headers)
-            ws.batch_clear(['A2:AZ100'])
-        except: pass
-
-        try:
-            ws = wb.worksheet('Scores')
-            headers_sco = ['hole', 'par'] + [f'p{i}' for i in range(12)]
-            ensure_headers(ws, headers_sco)
-            ws.batch_clear(['A2:Z100'])
-        except: pass
-        
+    try:
+        get_store().reset()
         st.toast("모든 데이터가 초기화되었습니다 (헤더 유지)")
+    except Exception as e: st.error(f"초기화 실패: {e}")
+    clear_game_state()
 
+# 세션의 게임 상태와 입력창 비우기 (리셋, 다른 게임으로 바꿀 때)
+def clear_game_state():
     # 1. 내부 변수 초기화
-    st.session_state.players = []
-    st.session_state.game_info = {'current_hole': 1, 'par': 4, 'participants_count': 4, 'cart_count': 1, 'pars': {}}
-    st.session_state.history = {}
+    st.session_state.round = RoundState()
+    st.session_state.game_info = {'current_hole': 1, 'par': 4, 'participants_count': 4, 'cart_count': 1}
+    st.session_state.sync_revs = None
+    st.session_state.base_rows = {}
+    invalidate_ledger()
     st.session_state.step = 1
     st.session_state.show_reset_confirm = False
 
@@ -208,72 +234,112 @@ def reset_all_data():
 
 # --- 계산 로직 (유지) ---
 def init_session_state():
+    if 'game_id' not in st.session_state:
+        st.session_state.game_id = storage.normalize_game_code(st.query_params.get('game')) or storage.DEFAULT_GAME
     if 'step' not in st.session_state: st.session_state.step = 1
-    if 'players' not in st.session_state: st.session_state.players = []
-    if 'game_info' not in st.session_state: st.session_state.game_info = {'current_hole': 1, 'par': 4, 'participants_count': 4, 'cart_count': 1, 'pars': {}}
-    if 'history' not in st.session_state: st.session_state.history = {}
-    if 'is_synced' not in st.session_state: sync_data(); st.session_state.is_synced = True
-
-def check_baepan(scores, par, num_players):
-    reasons = []; is_baepan = False
-    if any(s < par for s in scores): reasons.append("언더파"); is_baepan = True
-    if any((s - par) >= 3 for s in scores): reasons.append("트리플보기+"); is_baepan = True
-    if par == 3 and any((s - par) >= 2 for s in scores): reasons.append("파3 더블+"); is_baepan = True
-    cnt = Counter(scores)
-    if cnt and max(cnt.values()) > (num_players/2): reasons.append("과반수 동타"); is_baepan = True
-    return is_baepan, reasons
+    if 'round' not in st.session_state: st.session_state.round = RoundState()
+    if 'game_info' not in st.session_state: st.session_state.game_info = {'current_hole': 1, 'par': 4, 'participants_count': 4, 'cart_count': 1}
+    if 'is_synced' not in st.session_state:
+        # 로컬 저널에 남은 마지막 상태로 먼저 그림. 다시 보낼 저장이 남았거나 실패 중(오프라인)이면
+        # 네트워크를 기다리지 않고 그대로 시작하고, 아니면 원본과 맞춤 (변경분만 읽음)
+        status = write_status()
+        if not restore_local() or (not status['pending'] and not status['error']): sync_data()
+        st.session_state.is_synced = True
 
+# 네트워크 없이 로컬 저널의 상태로 세션 채우기. 저널이 없으면 False
+def restore_local():
+    try: state = get_store().local_state()
+    except Exception: state = None
+    if state is None: return False
+    apply_loaded(*state)
+    return True
+
+# 홀별 결과표는 보관하지 않음 (필요할 때 RoundState 에서 다시 계산, 누적은 Ledger 가 가짐)
 def calculate_settlement(hole_num):
-    players = st.session_state.players
-    par = st.session_state.game_info['pars'].get(hole_num, 4)
-    num_players = len(players); scores = [p['scores'].get(hole_num, 0) for p in players]
-    names = [p['name'] for p in players]
-    
-    is_baepan, baepan_reasons = check_baepan(scores, par, num_players)
-    stake = BASE_STAKE * BAEPAN_MULTIPLIER if is_baepan else BASE_STAKE
-    
-    m_str = [0]*num_players; m_bon = [0]*num_players
-    for i in range(num_players):
-        for j in range(i+1, num_players):
-            amt = (scores[j]-scores[i])*stake
-            m_str[i]+=amt; m_str[j]-=amt
-            
-    under = [i for i, s in enumerate(scores) if s < par]
-    for w in under:
-        for l in range(num_players):
-            if w!=l: m_bon[w]+=BONUS_AMOUNT; m_bon[l]-=BONUS_AMOUNT
+    rnd = st.session_state.round
+    par = rnd.par(hole_num)
+    scores = rnd.hole_scores(hole_num)
+    m_str, m_bon, is_baepan, baepan_reasons = get_rules().settle_hole(scores, par)
 
     res = []
-    for i in range(num_players):
-        res.append({'이름': names[i], '스코어': scores[i], '타당정산': m_str[i], '보너스': m_bon[i], '합계': m_str[i]+m_bon[i]})
-    
-    df = pd.DataFrame(res)
-    st.session_state.history[hole_num] = df
-    return df, is_baepan, baepan_reasons
+    for i, name in enumerate(rnd.names):
+        res.append({'이름': name, '스코어': scores[i], '타당정산': m_str[i], '보너스': m_bon[i], '합계': m_str[i]+m_bon[i]})
+    return res, is_baepan, baepan_reasons
+
+def build_ledger():
+    rnd = st.session_state.round
+    led = Ledger(rnd.names, get_rules())
+    led.load_round(*rnd.settle_arrays())
+    return led
+
+def get_ledger():
+    if st.session_state.get('ledger') is None: st.session_state.ledger = build_ledger()
+    return st.session_state.ledger
+
+# 점수/파/선수 구성이 바뀔 때마다 올라가는 상태 버전 (정산 스냅샷 캐시 키)
+def bump_version(): st.session_state.state_version = st.session_state.get('state_version', 0) + 1
+
+# 선수 구성/점수가 통째로 바뀌었을 때 (동기화, 설정 저장, 리셋)
+def invalidate_ledger():
+    st.session_state.ledger = None
+    bump_version()
+
+# 한 홀 점수가 바뀌었을 때 그 홀만 다시 반영
+def refresh_ledger_hole(hole_num):
+    bump_version()
+    led = st.session_state.get('ledger')
+    if led is None: return
+    rnd = st.session_state.round
+    led.set_hole(hole_num, rnd.par(hole_num), rnd.hole_scores(hole_num))
+
+# 이 홀 점수를 파로 되돌리기 (저장 전 임시 값)
+def reset_hole_scores(hole_num, par):
+    st.session_state.round.set_hole(hole_num, None, [par] * len(st.session_state.round))
+    refresh_ledger_hole(hole_num)
 
 def get_total_settlement():
-    tot = {p['name']: 0 for p in st.session_state.players}
-    for h in range(1, 19):
-        if not any(p['scores'].get(h) for p in st.session_state.players): continue
-        df, _, _ = calculate_settlement(h)
-        for _, r in df.iterrows(): tot[r['이름']] += r['합계']
-    return pd.DataFrame([{'이름': k, '누적금액': v} for k, v in tot.items()])
+    tot = get_ledger().totals()
+    return [{'이름': k, '누적금액': v} for k, v in tot.items()]
 
+# 최소 송금 건수로 정리 (engine.min_transfers)
 def calculate_transfer_details():
-    df = get_total_settlement()
-    if df.empty: return []
-    bal = dict(zip(df['이름'], df['누적금액']))
-    snd = sorted([{'name': k, 'amount': abs(v)} for k, v in bal.items() if v < 0], key=lambda x: x['amount'], reverse=True)
-    rcv = sorted([{'name': k, 'amount': v} for k, v in bal.items() if v > 0], key=lambda x: x['amount'], reverse=True)
-    
-    res = []; s=0; r=0
-    while s < len(snd) and r < len(rcv):
-        amt = min(snd[s]['amount'], rcv[r]['amount'])
-        if amt > 0: res.append({'보내는사람': snd[s]['name'], '받는사람': rcv[r]['name'], '금액': amt})
-        snd[s]['amount'] -= amt; rcv[r]['amount'] -= amt
-        if snd[s]['amount'] == 0: s+=1
-        if rcv[r]['amount'] == 0: r+=1
-    return res
+    bal = get_ledger().totals()
+    if not bal: return []
+    names = list(bal); amounts = list(bal.values())
+    return [{'보내는사람': names[s], '받는사람': names[r], '금액': amt} for s, r, amt in min_transfers(amounts)]
+
+# --- 내기 시뮬레이션 (라운드 전에 금액/핸디캡 노출 검토) ---
+# 지금 하우스 룰에서 금액만 바꿔 돌림. 파는 저장된 홀은 그 값, 나머지는 표준 파72 배치
+# 인원이 많으면 라운드 수를 줄여서 (라운드 x 선수) 칸 수를 SIM_CELLS 안으로
+SIM_ROUNDS = 200_000
+SIM_CELLS = SIM_ROUNDS * 12
+
+def simulate_stakes(names, handicaps, base_stake, multiplier, bonus_amount):
+    spec = dict(get_rules().spec, base_stake=base_stake, multiplier=multiplier)
+    spec['bonus'] = dict(spec.get('bonus', {}), amount=bonus_amount)
+    rnd = st.session_state.round
+    pars = [rnd.saved_par(h) or simulate.STANDARD_PARS[h - 1] for h in range(1, 19)]
+    rounds = max(1000, min(SIM_ROUNDS, SIM_CELLS // max(1, len(names))))
+    return simulate.simulate([simulate.handicap_profile(h) for h in handicaps], pars, rounds, spec, names)
+
+# --- 결과 화면용 정산 스냅샷 ---
+# 이번 홀 결과, 누적, 송금 내역을 한 번에 계산해 두고 상태 버전이 같으면 그대로 재사용합니다.
+# 표(DataFrame)는 화면(views)에서 그릴 때만 만듭니다.
+class Snapshot:
+    __slots__ = ('version', 'hole', 'hole_rows', 'is_baepan', 'reasons', 'total_rows', 'transfers')
+
+    def __init__(self, version, hole_num):
+        self.version = version; self.hole = hole_num
+        self.hole_rows, self.is_baepan, self.reasons = calculate_settlement(hole_num)
+        self.total_rows = get_total_settlement()
+        self.transfers = calculate_transfer_details()
+
+def get_snapshot(hole_num):
+    version = st.session_state.get('state_version', 0)
+    snap = st.session_state.get('snapshot')
+    if snap is None or snap.version != version or snap.hole != hole_num:
+        snap = st.session_state.snapshot = Snapshot(version, hole_num)
+    return snap
 
 def export_game_data(): return "{}"
 def load_game_data(f): return False
\ No newline at end of file
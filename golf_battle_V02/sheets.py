@@ -0,0 +1,186 @@
+import time
+import random
+import threading
+from collections import deque
+import streamlit as st
+
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+# --- 호출량 제한 (Sheets API 할당량: 사용자(서비스 계정)당 분당 읽기 60회, 쓰기 60회) ---
+# 어느 1분을 잘라 봐도 '한꺼번에 보낼 수 있는 양 + 분당 속도'가 할당량을 넘지 않게 잡음 (10 + 50 = 60)
+READS_PER_MIN = 50
+WRITES_PER_MIN = 50
+BURST = 10               # 쉬다가 한꺼번에 보낼 수 있는 최대 호출 수
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0       # 초, 시도마다 두 배 (최대 BACKOFF_MAX). 그 값의 절반 + 나머지 절반 안에서 무작위
+BACKOFF_MAX = 32.0
+
+# 이름으로 읽기/쓰기 구분 (나머지 메서드는 모두 쓰기로 셈)
+READ_METHODS = {'get', 'get_all_values', 'get_all_records', 'row_values', 'col_values', 'acell', 'cell', 'range',
+                'batch_get', 'values_get', 'values_batch_get', 'worksheet', 'worksheets', 'fetch_sheet_metadata'}
+
+# gspread APIError 등의 HTTP 상태 코드 (없으면 None)
+def http_status(e):
+    return getattr(getattr(e, 'response', None), 'status_code', None)
+
+def retryable(e):
+    status = http_status(e)
+    return status == 429 or (status is not None and 500 <= status < 600)
+
+class TokenBucket:
+    def __init__(self, per_min, burst):
+        self.rate = per_min / 60.0; self.capacity = burst
+        self.tokens = float(burst); self.t = time.monotonic()
+
+    def _refill(self, now):
+        if self.tokens < self.capacity: self.tokens = min(self.capacity, self.tokens + (now - self.t) * self.rate)
+        self.t = now
+
+    # 토큰 하나가 생길 때까지 남은 시간 (0 이면 바로 가능)
+    def wait_time(self, now):
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self): self.tokens -= 1
+
+# 프로세스 공용 제한기: 종류별 토큰 버킷, 429/5xx 에 지수 백오프(지터), 쓰기 우선
+# 429 를 받으면 그 백오프 동안은 모든 호출을 멈추고, 풀린 뒤에는 기다리던 쓰기가 먼저 나감
+class RateLimiter:
+    def __init__(self, reads_per_min=READS_PER_MIN, writes_per_min=WRITES_PER_MIN, burst=BURST,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.buckets = {'read': TokenBucket(reads_per_min, burst), 'write': TokenBucket(writes_per_min, burst)}
+        self.max_retries = max_retries; self.backoff_base = backoff_base; self.backoff_max = backoff_max
+        self.cond = threading.Condition()
+        self.waiting_writes = 0
+        self.resume_at = 0.0
+        self.counts = {'calls': {'read': 0, 'write': 0}, 'throttled': 0, 'rate_limited': 0, 'retries': 0, 'errors': 0}
+        self.latency = {'read': deque(maxlen=1000), 'write': deque(maxlen=1000)}
+
+    def acquire(self, kind):
+        with self.cond:
+            if kind == 'write': self.waiting_writes += 1
+            waited = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self.resume_at - now
+                    if wait <= 0 and kind == 'read' and self.waiting_writes: wait = 0.05
+                    if wait <= 0: wait = self.buckets[kind].wait_time(now)
+                    if wait <= 0: break
+                    waited = True
+                    self.cond.wait(wait)
+                self.buckets[kind].take()
+                if waited: self.counts['throttled'] += 1
+            finally:
+                if kind == 'write':
+                    self.waiting_writes -= 1; self.cond.notify_all()
+
+    def call(self, kind, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.acquire(kind)
+            t = time.perf_counter()
+            try:
+                res = fn(*args, **kwargs)
+                with self.cond: self.counts['calls'][kind] += 1; self.latency[kind].append(time.perf_counter() - t)
+                return res
+            except Exception as e:
+                with self.cond:
+                    self.counts['calls'][kind] += 1; self.latency[kind].append(time.perf_counter() - t)
+                    if not retryable(e) or attempt >= self.max_retries:
+                        self.counts['errors'] += 1
+                        raise
+                    cap = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                    delay = cap / 2 + random.uniform(0, cap / 2)
+                    self.counts['retries'] += 1
+                    if http_status(e) == 429:
+                        self.counts['rate_limited'] += 1
+                        self.resume_at = max(self.resume_at, time.monotonic() + delay)
+                attempt += 1
+                time.sleep(delay)
+
+    # 배포 규모 산정용 지표 (지연은 ms)
+    def metrics(self):
+        def pct(vals, q): return round(vals[min(len(vals) - 1, int(q * len(vals)))] * 1000, 1) if vals else None
+        with self.cond:
+            out = {k: (dict(v) if isinstance(v, dict) else v) for k, v in self.counts.items()}
+            for kind, lat in self.latency.items():
+                vals = sorted(lat)
+                out[f'{kind}_ms'] = {'p50': pct(vals, 0.5), 'p90': pct(vals, 0.9), 'p99': pct(vals, 0.99)}
+        return out
+
+# gspread 객체를 감싸서 메서드 호출마다 제한기를 거치게 함 (속성은 그대로)
+class Limited:
+    def __init__(self, target, limiter):
+        self._target = target; self._limiter = limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr): return attr
+        kind = 'read' if name in READ_METHODS else 'write'
+        def call(*args, **kwargs): return self._limiter.call(kind, attr, *args, **kwargs)
+        return call
+
+# --- 공유 클라이언트 풀 ---
+# 인증/스프레드시트 열기는 프로세스당 한 번만 하고 모든 세션이 같이 씁니다.
+# 토큰은 gspread 세션(AuthorizedSession)이 만료 직전에 알아서 갱신합니다.
+class SheetPool:
+    def __init__(self, creds_dict, sheet_url):
+        self.creds_dict = creds_dict
+        self.sheet_url = sheet_url
+        self.client = None
+        self.wb = None
+        self.worksheets = {}
+        self.headers = {}
+        self.stats = {'hits': 0, 'misses': 0, 'auth': 0, 'open': 0}
+        self.lock = threading.RLock()
+        self.limiter = RateLimiter()
+
+    # gspread/oauth2client 는 시트에 처음 접근할 때 불러옵니다 (콜드 스타트 단축)
+    def authorize(self):
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(self.creds_dict, SCOPE)
+        self.stats['auth'] += 1
+        return gspread.authorize(creds)
+
+    def workbook(self):
+        with self.lock:
+            if self.client is None: self.client = self.authorize()
+            if self.wb is None:
+                self.wb = Limited(self.limiter.call('read', self.client.open_by_url, self.sheet_url), self.limiter)
+                self.stats['open'] += 1
+            return self.wb
+
+    def worksheet(self, title):
+        with self.lock:
+            ws = self.worksheets.get(title)
+            if ws is not None:
+                self.stats['hits'] += 1
+                return ws
+            self.stats['misses'] += 1
+            ws = Limited(self.workbook().worksheet(title), self.limiter)
+            self.worksheets[title] = ws
+            return ws
+
+    def add_worksheet(self, title, rows, cols):
+        with self.lock:
+            ws = Limited(self.workbook().add_worksheet(title, rows, cols), self.limiter)
+            self.worksheets[title] = ws
+            return ws
+
+    # 시트가 삭제/변경되었을 때 캐시된 핸들과 헤더 위치 버리기
+    def forget(self, title=None):
+        with self.lock:
+            if title is None:
+                self.wb = None; self.worksheets.clear(); self.headers.clear()
+            else:
+                self.worksheets.pop(title, None); self.headers.pop(title, None)
+
+# 할당량은 [sheets] reads_per_min / writes_per_min 으로 조정 (같은 서비스 계정을 여러 앱이 나눠 쓸 때)
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    cfg = st.secrets["sheets"]
+    pool = SheetPool(dict(st.secrets["gcp_service_account"]), cfg["url"])
+    pool.limiter = RateLimiter(cfg.get("reads_per_min", READS_PER_MIN), cfg.get("writes_per_min", WRITES_PER_MIN))
+    return pool
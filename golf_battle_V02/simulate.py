@@ -0,0 +1,123 @@
+# 내기 시뮬레이터: 선수별/파별 스코어 분포에서 라운드를 수십만 번 뽑아 실제 규칙(RuleSet)대로 정산하고
+# 선수별 기대 손익, 분산, 꼬리 손실을 봅니다. 라운드 전에 타당 금액/배판 배수/보너스나 핸디캡 노출을 정할 때 씁니다.
+#   python simulate.py --handicaps 5,12,20,28 --rounds 200000
+#   python simulate.py --handicaps 5,12,20,28 --stake 2000 --multiplier 2 --workers 4
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from engine import DEFAULT_RULES, MAX_HOLES, compile_rules
+
+DIFFS = np.arange(-2, 6)                    # 분포의 칸: 파 대비 -2(이글) ~ +5
+STANDARD_PARS = [4, 4, 3, 4, 5, 4, 3, 4, 5, 4, 4, 3, 4, 5, 4, 3, 4, 5]  # 파72
+CHUNK_CELLS = 1 << 21                       # 한 번에 뽑는 점수 칸 수 (라운드 x 선수 x 홀), 메모리 상한
+TAIL = 0.05                                 # 꼬리 손실 기준 (하위 5%)
+
+# --- 스코어 분포 ---
+# 핸디캡으로 만드는 대략적인 파별 분포 (DIFFS 칸별 확률).
+# 홀당 평균 오버 = 핸디캡 / 18 (파3 은 조금 적게, 파5 는 조금 많게), 핸디캡이 클수록 폭이 넓음
+def handicap_probs(handicap, par):
+    mean = handicap / 18 * {3: 0.85, 5: 1.15}.get(par, 1.0)
+    sd = 0.6 + 0.025 * handicap
+    w = np.exp(-0.5 * ((DIFFS - mean) / sd) ** 2)
+    return w / w.sum()
+
+def handicap_profile(handicap): return {par: handicap_probs(handicap, par) for par in (3, 4, 5)}
+
+# 선수별 {파: 확률} -> (선수, 홀, 칸) 누적 확률. 없는 파는 파4 분포를 씀
+def hole_cdfs(profiles, pars):
+    table = np.array([[np.asarray(p.get(par, p[4]), dtype=float) for par in pars] for p in profiles])
+    if table.shape[-1] != len(DIFFS): raise ValueError(f"분포는 파 대비 {DIFFS[0]}~+{DIFFS[-1]} 의 {len(DIFFS)}칸이어야 합니다")
+    if (table < 0).any() or (table.sum(axis=-1) <= 0).any(): raise ValueError("분포 확률이 잘못됐습니다")
+    cdf = np.cumsum(table / table.sum(axis=-1, keepdims=True), axis=-1)
+    cdf[..., -1] = 1.0
+    return cdf
+
+# (라운드, 선수, 홀) 점수 뽑기. 칸 번호 = 균등 난수보다 작거나 같은 누적 확률 개수 (칸 수만큼 비교 한 번씩)
+def sample_rounds(cdf, pars, rounds, rng):
+    u = rng.random((rounds,) + cdf.shape[:2], dtype=np.float32)
+    idx = np.zeros(u.shape, dtype=np.int8)
+    for j in range(cdf.shape[-1] - 1): idx += u >= cdf[..., j].astype(np.float32)
+    return np.asarray(pars, dtype=np.int64) + DIFFS[idx]
+
+# --- 시뮬레이션 ---
+# 한 묶음: 라운드별 선수 손익 합계 (라운드, 선수)와 배판 홀 수. 프로세스 풀에서도 돌도록 규칙은 설정(dict)으로 받음
+def simulate_chunk(spec, cdf, pars, rounds, seed):
+    rules = compile_rules(spec)
+    rng = np.random.default_rng(seed)
+    totals, baepan = rules.totals(sample_rounds(cdf, pars, rounds, rng), pars)
+    return totals, int(baepan.sum())
+
+class SimulationResult:
+    __slots__ = ('names', 'rounds', 'totals', 'baepan_rate', 'seconds')
+
+    def __init__(self, names, totals, baepan_rate, seconds):
+        self.names = list(names)
+        self.rounds = len(totals)
+        self.totals = totals                # (라운드, 선수) 라운드별 손익
+        self.baepan_rate = baepan_rate      # 배판이 된 홀 비율
+        self.seconds = seconds
+
+    def mean(self): return self.totals.mean(axis=0)
+    def std(self): return self.totals.std(axis=0)
+
+    # 하위 tail 분위 손익 (VaR) 과 그보다 나쁜 라운드들의 평균 (기대 꼬리 손실)
+    def tail(self, q=TAIL):
+        k = max(1, int(self.rounds * q))
+        worst = np.partition(self.totals, k - 1, axis=0)[:k]
+        return worst.max(axis=0), worst.mean(axis=0)
+
+    # 화면/출력용 선수별 요약 (원 단위 반올림)
+    def rows(self, q=TAIL):
+        mean, std = self.mean(), self.std()
+        var_, cvar = self.tail(q)
+        lose = (self.totals < 0).mean(axis=0)
+        worst = self.totals.min(axis=0)
+        pct = int(q * 100)
+        return [{'이름': name, '기대값': round(mean[i]), '표준편차': round(std[i]), '잃을 확률': f"{lose[i]:.1%}",
+                 f'하위{pct}% 손익': int(var_[i]), f'하위{pct}% 평균': round(cvar[i]), '최악': int(worst[i])}
+                for i, name in enumerate(self.names)]
+
+# profiles: 선수별 {파: DIFFS 칸별 확률} (handicap_profile 참고), rules: RuleSet 또는 규칙 설정(dict)
+# 같은 seed 면 workers 수와 상관없이 같은 결과 (묶음마다 시드를 미리 나눠 둠)
+def simulate(profiles, pars=None, rounds=200_000, rules=None, names=None, seed=None, workers=1):
+    pars = list(pars or STANDARD_PARS)[:MAX_HOLES]
+    spec = getattr(rules, 'spec', rules) or DEFAULT_RULES
+    compile_rules(spec)  # 잘못된 규칙은 묶음을 나누기 전에 ValueError
+    cdf = hole_cdfs(profiles, pars)
+    n = len(profiles)
+    per_chunk = max(1, CHUNK_CELLS // max(1, n * len(pars)))
+    sizes = [min(per_chunk, rounds - i) for i in range(0, rounds, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    start = time.perf_counter()
+    args = [(spec, cdf, pars, size, s) for size, s in zip(sizes, seeds)]
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(min(workers, len(sizes))) as pool: parts = list(pool.map(simulate_chunk, *zip(*args)))
+    else: parts = [simulate_chunk(*a) for a in args]
+    totals = np.concatenate([t for t, _ in parts]) if parts else np.zeros((0, n), dtype=np.int64)
+    baepan_rate = sum(b for _, b in parts) / max(1, rounds * len(pars))
+    return SimulationResult(names or [f'P{i+1}' for i in range(n)], totals, baepan_rate, time.perf_counter() - start)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="핸디캡별 내기 손익 시뮬레이션")
+    ap.add_argument('--handicaps', default='5,12,20,28', help="선수별 핸디캡 (쉼표 구분)")
+    ap.add_argument('--names', default='', help="선수 이름 (쉼표 구분)")
+    ap.add_argument('--rounds', type=int, default=200_000)
+    ap.add_argument('--stake', type=int, default=DEFAULT_RULES['base_stake'])
+    ap.add_argument('--multiplier', type=int, default=DEFAULT_RULES['multiplier'])
+    ap.add_argument('--bonus', type=int, default=DEFAULT_RULES['bonus']['amount'])
+    ap.add_argument('--workers', type=int, default=1, help="프로세스 수 (1 이면 현재 프로세스에서)")
+    ap.add_argument('--seed', type=int, default=None)
+    args = ap.parse_args(argv)
+    hcps = [float(h) for h in args.handicaps.split(',') if h.strip()]
+    names = [s.strip() for s in args.names.split(',')] if args.names else None
+    spec = dict(DEFAULT_RULES, base_stake=args.stake, multiplier=args.multiplier,
+                bonus=dict(DEFAULT_RULES['bonus'], amount=args.bonus))
+    res = simulate([handicap_profile(h) for h in hcps], rounds=args.rounds, rules=spec, names=names, seed=args.seed, workers=args.workers)
+    rows = res.rows()
+    cols = list(rows[0])
+    print(' '.join(f"{c:>12s}" for c in cols))
+    for row in rows: print(' '.join(f"{str(row[c]):>12s}" for c in cols))
+    print(f"{res.rounds}라운드, 배판 홀 {res.baepan_rate:.1%}, {res.seconds:.2f}초 (workers={args.workers})")
+
+if __name__ == '__main__': main()
@@ -0,0 +1,1047 @@
+import os
+import re
+import json
+import time
+import random
+import queue
+import sqlite3
+import threading
+import streamlit as st
+import sheets
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- 저장소 설정 (.streamlit/secrets.toml) ---
+# [storage]
+# backend = "sheets"        # "sheets"(기본) 또는 "sqlite"
+# path = "golf.db"          # sqlite 파일 경로 (앱 폴더 기준)
+# mirror_sheets = true      # sqlite 사용 시 구글 시트에도 비동기로 복사 (보기용)
+# cache_ttl = 5             # 세션 공용 읽기 캐시 유지 시간(초), 0 이면 캐시 끔
+# write_behind = true       # 저장을 백그라운드로 모아서 쓰기 (기본 켜짐)
+# journal = "journal.jsonl" # 백그라운드 저장 전에 남기는 로컬 저널 (앱 폴더 기준), "" 이면 끔
+#
+# [rules]                   # 하우스 룰 (없으면 기본 규칙, 형식은 engine.DEFAULT_RULES)
+# multiplier = 2
+# bonus = { amount = 2000, diff_max = -1 }
+# [[rules.baepan]]
+# reason = "언더파"
+# diff_max = -1
+#
+# 한 배포에서 여러 게임(조)을 동시에 돌릴 수 있고, 게임마다 저장 위치가 따로입니다 (게임 코드로 참가).
+#   시트:   게임마다 Settings_<코드> / Players_<코드> / Scores_<코드> / Strokes_<코드> (처음 쓸 때 만듦). 기본 게임은 코드 없이 Settings / Players / Scores / Strokes
+#   sqlite: 모든 표가 game 열로 나뉨
+#   저널:   journal-<코드>.jsonl
+# 저장소 체인(백그라운드 저장, 캐시)도 게임마다 하나씩이라 다른 조의 읽기/쓰기와 섞이지 않습니다.
+#
+# 모든 저장소는 같은 형태로 데이터를 주고받습니다.
+#   settings: {'participants_count': '4', 'cart_count': '1', 'player_0': '홍길동', 'cart_0': '1', ...} (문자열) 또는 None
+#   holes:    {hole: {'par': 4 또는 None, 'scores': {선수 번호: 점수}}}
+#   revs:     {'revision': 전체 리비전, 'settings': 설정 행 리비전, 'holes': {hole: 홀 행 리비전}}
+# 쓰기마다 전체 리비전과 그 행의 리비전이 새 값으로 바뀝니다. 저장 함수는 새 행 리비전을 돌려줍니다.
+# 실제 쓰기는 save_batch 하나로 모입니다.
+#   settings: ((인원, 카트 수, 이름들, 카트들), 리비전) 또는 None
+#   holes:    {hole: (par, 점수 리스트, 리비전)}
+class Storage:
+    name = 'base'
+    def load(self): raise NotImplementedError
+    def save_batch(self, settings, holes): raise NotImplementedError
+    def reset(self): raise NotImplementedError
+
+    def save_settings(self, num_participants, num_carts, names, carts):
+        rev = new_revision()
+        self.save_batch(((num_participants, num_carts, names, carts), rev), {})
+        return rev
+
+    def save_hole(self, hole_num, par, scores_list):
+        rev = new_revision()
+        self.save_batch(None, {hole_num: (par, scores_list, rev)})
+        return rev
+
+    # 세션이 본 행(base: {'par', 'scores'} 또는 None)과 비교해 칸 단위로 합쳐 쓰기 (WriteCoordinator 참고)
+    # (새 행 리비전, 쓴 파, 쓴 점수 리스트, 못 바꾼 칸 목록)을 돌려줌. 기본은 조정 없이 행 전체를 씀
+    def merge_hole(self, hole_num, par, scores_list, base=None):
+        return self.save_hole(hole_num, par, scores_list), par, list(scores_list), []
+
+    # 밀린 쓰기를 기다리기 (백그라운드 저장용). 제때 다 쓰면 True
+    def flush(self, timeout=None): return True
+    # 화면 표시용 저장 상태
+    def write_status(self): return {'pending': 0, 'error': None}
+    # 네트워크 없이 바로 쓸 수 있는 마지막 상태 (load() 형태) 또는 None
+    def local_state(self): return None
+
+    # 변경분 동기화용. revision() 이 None 이면 항상 전체 load() 를 씁니다.
+    def revision(self): return None
+    def row_revisions(self): raise NotImplementedError    # (설정 리비전, {hole: 리비전})
+    def load_holes(self, holes): raise NotImplementedError  # {hole: 기록} (지워진 홀은 빠짐)
+
+_last_rev = [0]
+_rev_lock = threading.Lock()
+
+# 새 리비전: 밀리초 시각 (같은 프로세스 안에서는 항상 증가). 문자열로 저장/비교
+def new_revision():
+    with _rev_lock:
+        _last_rev[0] = max(_last_rev[0] + 1, int(time.time() * 1000))
+        return str(_last_rev[0])
+
+def newest(revs): return max(revs, key=int)
+
+# --- 게임 코드 ---
+DEFAULT_GAME = 'default'
+GAME_CODE_CHARS = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'   # 헷갈리는 0/O, 1/I 제외
+GAME_CODE_LEN = 5
+
+def new_game_code(): return ''.join(random.choice(GAME_CODE_CHARS) for _ in range(GAME_CODE_LEN))
+
+# 입력한 코드를 대문자로 맞춤. 시트 이름/파일 이름에 그대로 쓰므로 영문/숫자 3~12자만 허용, 아니면 None
+def normalize_game_code(code):
+    code = str(code or '').strip().upper()
+    return code if re.fullmatch(r'[A-Z0-9]{3,12}', code) else None
+
+def copy_holes(holes): return {h: {'par': rec['par'], 'scores': dict(rec['scores'])} for h, rec in holes.items()}
+
+# 이 프로세스에서 쓴 뒤의 전체 리비전 자리표시. 원본의 어떤 리비전과도 같지 않아서
+# 그 사이 다른 곳에서 쓴 변경이 있어도 다음 동기화가 행 리비전 비교로 넘어감
+def local_revision(rev): return f'local-{rev}'
+
+# 저장할 설정 값을 load() 가 돌려주는 설정 형태(문자열 딕셔너리)로
+def settings_map(num_participants, num_carts, names, carts):
+    out = {'participants_count': str(num_participants), 'cart_count': str(num_carts)}
+    for i, (name, cart) in enumerate(zip(names, carts)):
+        out[f'player_{i}'] = str(name); out[f'cart_{i}'] = str(cart)
+    return out
+
+# ==========================================
+# 구글 시트: 게임마다 시트 네 개, 모두 한 행 = 기록 하나 (선수 수만큼 열이 늘지 않음)
+#   Settings: 1행 헤더, 2행 [인원, 카트 수, 설정 행 리비전, 전체 리비전]
+#   Players:  [선수 번호, 이름, 카트], i번 선수는 i+2행
+#   Scores:   [홀, 파, 홀 행 리비전], n번 홀은 n+1행
+#   Strokes:  [홀, 선수 번호, 점수], 홀마다 MAX_PLAYERS 행 자리의 고정 블록 중 앞쪽 인원 수만큼만 씀 (점수 없는 선수는 빈 행)
+# 행 위치가 모두 고정이라 쓰기 전에 읽지 않고, 읽기/쓰기는 각각 스프레드시트 단위 batch 한 번입니다.
+# ==========================================
+MAX_PLAYERS = 500
+MAX_HOLES = 18
+SETTINGS_HEADERS = ['participants_count', 'cart_count', 'rev', 'revision']
+PLAYERS_HEADERS = ['player', 'name', 'cart']
+SCORES_HEADERS = ['hole', 'par', 'rev']
+STROKES_HEADERS = ['hole', 'player', 'score']
+REV_KEYS = ('rev', 'revision')
+# 읽기/초기화 범위의 오른쪽 아래 끝 (Settings/Scores 는 예전 가로 배치까지 덮음)
+SETTINGS_RANGE = 'AZ100'
+SCORES_RANGE = 'Z100'
+
+# 게임별 (Settings, Players, Scores, Strokes) 시트 이름
+def sheet_titles(game=DEFAULT_GAME):
+    names = ('Settings', 'Players', 'Scores', 'Strokes')
+    return names if game == DEFAULT_GAME else tuple(f'{t}_{game}' for t in names)
+
+# 시트 이름이 붙은 A1 범위
+def a1(title, ref): return f"'{title}'!{ref}"
+
+def col_letter(idx):
+    s = ''; idx += 1
+    while idx: idx, r = divmod(idx - 1, 26); s = chr(65 + r) + s
+    return s
+
+# --- 헤더 강제 복구 (안전장치) ---
+# 시트별로 프로세스당 한 번만 확인하고, 찾은 열 위치 {헤더명: 열 번호}를 풀에 캐시합니다.
+def ensure_headers(ws, header_list):
+    pool = sheets.get_pool()
+    cols = pool.headers.get(ws.title)
+    if cols is not None: return cols
+    try:
+        first_row = ws.row_values(1)
+        if not first_row:
+            ws.append_row(header_list)
+            first_row = header_list
+
+        # 첫 줄이 데이터라면 헤더 삽입
+        expected = header_list[0]
+        current = str(first_row[0]).strip()
+        if current != expected:
+            ws.insert_row(header_list, index=1)
+            first_row = header_list
+        # 예전 헤더(리비전 열 없음)는 뒤에 새 열만 붙임
+        elif len(first_row) < len(header_list) and first_row == header_list[:len(first_row)]:
+            ws.batch_update([{'range': 'A1', 'values': [header_list]}])
+            first_row = header_list
+        cols = {c: i for i, c in enumerate(first_row) if c}
+        pool.headers[ws.title] = cols
+        return cols
+    except Exception as e:
+        # API 오류(할당량 초과 등)는 조용히 넘기지 않고 올려 보냄
+        if sheets.http_status(e) is not None: raise
+        return {c: i for i, c in enumerate(header_list)}
+
+# 한 번에 읽은 값의 첫 줄이 기대한 헤더(리비전 열 포함)로 시작하는지
+def headers_ok(rows, header_list):
+    return bool(rows) and rows[0][:len(header_list)] == header_list
+
+# 읽은 헤더 줄에서 {헤더명: 열 번호}를 만들어 ensure_headers 와 같은 캐시에 넣음
+def header_cols(title, rows, header_list):
+    pool = sheets.get_pool()
+    cols = pool.headers.get(title)
+    if cols is None:
+        cols = pool.headers[title] = {c: i for i, c in enumerate(rows[0]) if c} if rows else {c: i for i, c in enumerate(header_list)}
+    return cols
+
+# 쓰기 실패가 시트 구조 변경(삭제/이름 변경/범위 밖)을 가리키면 캐시된 헤더와 핸들을 버림
+def check_schema_drift(title, e):
+    import gspread
+    if isinstance(e, gspread.exceptions.WorksheetNotFound) or sheets.http_status(e) in (400, 404):
+        sheets.get_pool().forget(title)
+
+# --- 시트 초기화 ---
+# 고정 행 배치가 다 들어가는 크기 (Players/Strokes 는 쓰기가 시트 범위를 넘으면 실패하므로)
+def sheet_sizes():
+    return ((10, 30), (player_row(MAX_PLAYERS - 1), len(PLAYERS_HEADERS)), (50, 20),
+            (stroke_row(MAX_HOLES, MAX_PLAYERS - 1), len(STROKES_HEADERS)))
+
+# 게임의 시트들을 없을 때만 만듦 (API 오류로 못 찾은 경우는 그대로 올려 보냄)
+def init_sheets(wb, game=DEFAULT_GAME):
+    for title, (rows, cols) in zip(sheet_titles(game), sheet_sizes()):
+        try: wb.worksheet(title)
+        except Exception as e:
+            if sheets.http_status(e) is not None: raise
+            wb.add_worksheet(title, rows, cols)
+
+# --- 고정 행 배치: 1행은 헤더 ---
+def score_row(hole_num): return hole_num + 1
+def player_row(p_idx): return p_idx + 2
+def stroke_row(hole_num, p_idx=0): return 2 + (hole_num - 1) * MAX_PLAYERS + p_idx
+def stroke_block(hole_num, count=MAX_PLAYERS): return f'A{stroke_row(hole_num)}:C{stroke_row(hole_num, max(1, min(count, MAX_PLAYERS)) - 1)}'
+
+# 홀 블록 앞쪽을 덮어쓸 값: 점수 있는 선수는 [홀, 선수, 점수], 점수 없는 선수는 빈 행
+# width 가 더 길면 (인원이 줄어 전에 쓴 행이 남은 경우) 그 행까지 빈 행으로 지움
+def stroke_block_values(hole_num, scores_list, width=0):
+    scores_list = list(scores_list)[:MAX_PLAYERS]
+    rows = [[hole_num, i, s] if s else ['', '', ''] for i, s in enumerate(scores_list)]
+    return rows + [['', '', '']] * (min(width, MAX_PLAYERS) - len(rows))
+
+# 설정의 인원 수 (없거나 잘못된 값은 0)
+def participants(settings):
+    try: return max(0, min(int((settings or {}).get('participants_count') or 0), MAX_PLAYERS))
+    except (TypeError, ValueError): return 0
+
+def parse_score_row(row, cols, p_indices):
+    hole_idx = cols.get('hole', -1); par_idx = cols.get('par', -1)
+    if hole_idx == -1 or len(row) <= hole_idx or not row[hole_idx]: return None, None
+    try: h = int(row[hole_idx])
+    except: return None, None
+    rec = {'par': None, 'scores': {}}
+    if par_idx != -1 and len(row) > par_idx:
+        try: rec['par'] = int(row[par_idx])
+        except: pass
+    for p_idx, c in p_indices.items():
+        if c < len(row) and row[c] and str(row[c]).strip():
+            try: rec['scores'][p_idx] = int(row[c])
+            except: pass
+    return h, rec
+
+# 예전 가로 배치의 선수 열 (p0..p11). 새 배치에는 없음
+def player_columns(cols): return {int(c[1:]): idx for c, idx in cols.items() if c.startswith('p') and c[1:].isdigit()}
+
+# Strokes 홀 블록 하나 -> {선수: 점수} (다른 홀 번호가 적힌 행은 무시)
+def parse_stroke_block(hole_num, rows):
+    scores = {}
+    for row in rows:
+        try:
+            if int(cell(row, 0)) != hole_num: continue
+            scores[int(cell(row, 1))] = int(cell(row, 2))
+        except: continue
+    return scores
+
+# Players 행들 -> 설정 형태의 player_i / cart_i
+def parse_player_rows(rows):
+    out = {}
+    for row in rows[1:]:
+        try: i = int(cell(row, 0))
+        except: continue
+        out[f'player_{i}'] = cell(row, 1); out[f'cart_{i}'] = cell(row, 2)
+    return out
+
+# Settings 값 행 -> (설정 딕셔너리 또는 None, 설정 행 리비전, 전체 리비전)
+def parse_settings_rows(rows, s_cols):
+    if len(rows) < 2: return None, '', ''
+    data = rows[1]
+    settings = {k: data[i] for k, i in s_cols.items() if i < len(data) and k not in REV_KEYS}
+    # 홀 저장이 리비전만 써 둔 빈 설정 행은 설정 없음으로 취급
+    return settings if any(settings.values()) else None, cell(data, s_cols.get('rev')), cell(data, s_cols.get('revision'))
+
+# Scores 행들 -> ({hole: 기록}, {hole: 리비전}, 고정 행 위치를 벗어난 행이 있는지)
+def parse_score_rows(rows, cols):
+    holes = {}; hole_revs = {}; misplaced = False
+    p_indices = player_columns(cols)
+    for r_num, row in enumerate(rows[1:], start=2):
+        h, rec = parse_score_row(row, cols, p_indices)
+        if h is None: continue
+        if score_row(h) != r_num: misplaced = True
+        holes[h] = rec
+        hole_revs[h] = cell(row, cols.get('rev'))
+    return holes, hole_revs, misplaced
+
+def cell(values, i):
+    return values[i] if i is not None and i < len(values) else ''
+
+# values_batch_get 결과에서 범위별 2차원 값 꺼내기 (빈 범위는 values 가 없음)
+def batch_values(res): return [vr.get('values', []) for vr in res.get('valueRanges', [])]
+
+# 예전 방식(append 순서)으로 쌓인 시트를 고정 행 배치로 한 번만 재정렬 (같은 홀은 나중 행 우선)
+def relayout_scores(ws, rows, hole_idx):
+    by_hole = {}
+    for row in rows[1:]:
+        try: by_hole[int(row[hole_idx])] = row
+        except: continue
+    ws.batch_clear([f'A2:{SCORES_RANGE}'])
+    if by_hole: ws.batch_update([{'range': f'A{score_row(h)}', 'values': [r]} for h, r in sorted(by_hole.items())])
+
+# 예전 가로 배치(Settings 한 행에 선수 12명 열, Scores 에 p0..p11 열)인지
+def is_wide_layout(settings_rows, score_rows):
+    return bool(settings_rows and 'player_0' in settings_rows[0]) or bool(score_rows and 'p0' in score_rows[0])
+
+# 게임 하나 = 시트 네 개. 읽기/쓰기는 그 게임의 시트 범위만 건드림
+class SheetsStorage(Storage):
+    name = 'sheets'
+
+    def __init__(self, game=DEFAULT_GAME):
+        self.game = game
+        self.titles = sheet_titles(game)
+        self.settings_title, self.players_title, self.scores_title, self.strokes_title = self.titles
+        # 홀 블록마다 점수 행이 있을 수 있는 앞쪽 선수 수 (읽기/지우기 범위). 아직 모르면 None
+        self.players = None
+
+    def worksheet(self, title):
+        wb = sheets.get_pool()
+        try: return wb.worksheet(title)
+        except Exception as e:
+            if sheets.http_status(e) is not None: raise
+            # 같은 게임에 동시에 처음 들어온 세션들이 시트를 두 번 만들지 않게 풀 락 안에서
+            with wb.lock: init_sheets(wb, self.game)
+            return wb.worksheet(title)
+
+    def ensure_all_headers(self):
+        return [ensure_headers(self.worksheet(t), h) for t, h in zip(self.titles, (SETTINGS_HEADERS, PLAYERS_HEADERS, SCORES_HEADERS, STROKES_HEADERS))]
+
+    # 네 시트(헤더 포함, Strokes 는 홀 블록마다 앞쪽 count 행)를 values_batch_get 한 번으로 읽기
+    # -> (Settings 행들, Players 행들, Scores 행들, Strokes 헤더 행들, [홀 블록 행들] x 18, count 가 0 이면 빈 목록)
+    def read_all(self, count):
+        ranges = [a1(self.settings_title, f'A1:{SETTINGS_RANGE}'), a1(self.players_title, f'A1:C{player_row(MAX_PLAYERS - 1)}'),
+                  a1(self.scores_title, f'A1:{SCORES_RANGE}'), a1(self.strokes_title, 'A1:C1')]
+        if count: ranges += [a1(self.strokes_title, stroke_block(h, count)) for h in range(1, MAX_HOLES + 1)]
+        res = batch_values(sheets.get_pool().workbook().values_batch_get(ranges))
+        return res[0], res[1], res[2], res[3], res[4:]
+
+    # 홀 블록들만 앞쪽 count 행씩 읽기
+    def read_blocks(self, count):
+        return batch_values(sheets.get_pool().workbook().values_batch_get([a1(self.strokes_title, stroke_block(h, count)) for h in range(1, MAX_HOLES + 1)]))
+
+    # 블록은 지난번에 안 인원 수만큼 같이 읽고, 설정의 인원이 그보다 많을 때만 블록을 한 번 더 읽음
+    def load(self):
+        count = self.players or 0
+        try: rows = self.read_all(count)
+        except Exception as e:
+            if sheets.retryable(e): raise
+            # 시트가 없거나 이름이 바뀐 경우: 핸들을 버리고 시트를 만든 뒤 다시 읽기
+            for title in self.titles:
+                sheets.get_pool().forget(title); self.worksheet(title)
+            rows = self.read_all(count)
+        if is_wide_layout(rows[0], rows[2]):
+            self.migrate_wide(rows[0], rows[2])
+            rows = self.read_all(count)
+        # 헤더가 어긋난 경우에만 고치고 다시 읽음 (고친 뒤 헤더 위치는 캐시됨)
+        if not all(headers_ok(r, h) for r, h in zip(rows, (SETTINGS_HEADERS, PLAYERS_HEADERS, SCORES_HEADERS, STROKES_HEADERS))):
+            self.ensure_all_headers()
+            rows = self.read_all(count)
+        settings_rows, player_rows, score_rows, _, blocks = rows
+        s_cols = header_cols(self.settings_title, settings_rows, SETTINGS_HEADERS)
+        cols = header_cols(self.scores_title, score_rows, SCORES_HEADERS)
+
+        settings, settings_rev, revision = parse_settings_rows(settings_rows, s_cols)
+        if settings is not None: settings.update(parse_player_rows(player_rows))
+        holes, hole_revs, misplaced = parse_score_rows(score_rows, cols)
+        n = participants(settings)
+        if n > count: blocks = self.read_blocks(n)
+        self.players = max(n, count)
+        for h, rec in holes.items():
+            if h <= MAX_HOLES: rec['scores'] = parse_stroke_block(h, blocks[h - 1] if blocks else [])
+        if misplaced: relayout_scores(self.worksheet(self.scores_title), score_rows, cols['hole'])
+        return settings, holes, {'revision': revision, 'settings': settings_rev, 'holes': hole_revs}
+
+    # 예전 가로 배치를 새 배치로 한 번만 옮김 (리비전은 그대로라 다른 세션은 다시 읽을 필요 없음)
+    def migrate_wide(self, settings_rows, score_rows):
+        s_cols = {c: i for i, c in enumerate(settings_rows[0]) if c} if settings_rows else {}
+        cols = {c: i for i, c in enumerate(score_rows[0]) if c} if score_rows else {}
+        settings, settings_rev, revision = parse_settings_rows(settings_rows, s_cols)
+        holes, hole_revs, _ = parse_score_rows(score_rows, cols)
+        settings = settings or {}
+        data = [{'range': a1(t, 'A1'), 'values': [h]} for t, h in zip(self.titles, (SETTINGS_HEADERS, PLAYERS_HEADERS, SCORES_HEADERS, STROKES_HEADERS))]
+        data.append({'range': a1(self.settings_title, 'A2'), 'values': [[settings.get('participants_count', ''), settings.get('cart_count', ''), settings_rev, revision]]})
+        players = [[i, settings.get(f'player_{i}', ''), settings.get(f'cart_{i}', '')] for i in range(sum(k.startswith('player_') for k in s_cols))]
+        players = [p for p in players if p[1] or p[2]]
+        if players: data.append({'range': a1(self.players_title, 'A2'), 'values': players})
+        for h, rec in sorted(holes.items()):
+            if not 1 <= h <= MAX_HOLES: continue
+            data.append({'range': a1(self.scores_title, f'A{score_row(h)}'), 'values': [[h, '' if rec['par'] is None else rec['par'], hole_revs[h]]]})
+            scores = [rec['scores'].get(i) for i in range(max(rec['scores'], default=-1) + 1)]
+            data.append({'range': a1(self.strokes_title, f'A{stroke_row(h)}'), 'values': stroke_block_values(h, scores)})
+        for title in self.titles: self.worksheet(title)
+        wb = sheets.get_pool().workbook()
+        wb.values_batch_clear(body={'ranges': [a1(self.settings_title, f'A1:{SETTINGS_RANGE}'), a1(self.scores_title, f'A1:{SCORES_RANGE}')]})
+        wb.values_batch_update({'valueInputOption': 'RAW', 'data': data})
+        for title in self.titles: sheets.get_pool().headers.pop(title, None)
+
+    # 전체 리비전 한 칸만 읽기
+    def revision(self):
+        ws = self.worksheet(self.settings_title)
+        cols = ensure_headers(ws, SETTINGS_HEADERS)
+        if 'revision' not in cols: return None
+        a1 = f"{col_letter(cols['revision'])}2"
+        return cell(cell(ws.get(a1), 0) or [], 0)
+
+    # 설정 행 리비전과 홀별 리비전 열을 한 번에 읽기
+    def row_revisions(self):
+        s_cols = ensure_headers(self.worksheet(self.settings_title), SETTINGS_HEADERS)
+        cols = ensure_headers(self.worksheet(self.scores_title), SCORES_HEADERS)
+        s_rev = a1(self.settings_title, f"{col_letter(s_cols['rev'])}2")
+        rev_col = col_letter(cols['rev']); hole_col = col_letter(cols['hole'])
+        res = batch_values(sheets.get_pool().workbook().values_batch_get(
+            [s_rev, a1(self.scores_title, f"{hole_col}2:{hole_col}{score_row(MAX_HOLES)}"), a1(self.scores_title, f"{rev_col}2:{rev_col}{score_row(MAX_HOLES)}")]))
+        settings_rev = cell(cell(res[0], 0) or [], 0)
+        hole_cells = res[1]; rev_cells = res[2]
+        hole_revs = {}
+        for i, row in enumerate(hole_cells):
+            try: h = int(cell(row, 0))
+            except: continue
+            hole_revs[h] = cell(cell(rev_cells, i) or [], 0)
+        return settings_rev, hole_revs
+
+    # 바뀐 홀의 Scores 행과 Strokes 블록만 골라 읽기 (한 번의 호출)
+    def load_holes(self, holes):
+        holes = sorted(h for h in holes if 1 <= h <= MAX_HOLES)
+        if not holes: return {}
+        cols = ensure_headers(self.worksheet(self.scores_title), SCORES_HEADERS)
+        last = col_letter(max(cols.values(), default=len(SCORES_HEADERS) - 1))
+        ranges = []
+        count = MAX_PLAYERS if self.players is None else self.players
+        for h in holes: ranges += [a1(self.scores_title, f"A{score_row(h)}:{last}{score_row(h)}"), a1(self.strokes_title, stroke_block(h, count))]
+        res = batch_values(sheets.get_pool().workbook().values_batch_get(ranges))
+        out = {}
+        for h, values, block in zip(holes, res[0::2], res[1::2]):
+            row_h, rec = parse_score_row(cell(values, 0) or [], cols, {})
+            if row_h != h: continue
+            rec['scores'] = parse_stroke_block(h, block)
+            out[h] = rec
+        return out
+
+    # 행 위치가 고정이라 읽기 없이 덮어쓰기 (다른 홀 동시 저장과 충돌 없음)
+    # 설정 행, 선수 행들, 홀 행들, 홀 블록들, 전체 리비전 칸은 시트가 달라서 스프레드시트 단위 batch 로 한 번에 씀
+    # 홀 블록은 선수 수만큼만 쓰고, 인원이 줄었을 때만 전에 쓴 뒤쪽 행을 빈 행으로 지움 (인원을 모르면 블록 끝까지)
+    def save_batch(self, settings, holes):
+        s_cols = self.ensure_all_headers()[0]
+        revs = [v[2] for v in holes.values()] + ([settings[1]] if settings else [])
+        if not revs: return
+        revision = newest(revs)
+        prev = MAX_PLAYERS if self.players is None else self.players
+        written = [len(v[1]) for h, v in holes.items() if 1 <= h <= MAX_HOLES]
+        data = []
+        for h, (par, scores, rev) in sorted(holes.items()):
+            if not 1 <= h <= MAX_HOLES: continue
+            data.append({'range': a1(self.scores_title, f'A{score_row(h)}'), 'values': [[h, par, rev]]})
+            data.append({'range': a1(self.strokes_title, f'A{stroke_row(h)}'), 'values': stroke_block_values(h, scores, prev)})
+        if settings:
+            (num_participants, num_carts, names, carts), rev = settings
+            n = min(num_participants, MAX_PLAYERS)
+            if n < prev:
+                data += [{'range': a1(self.strokes_title, f'A{stroke_row(h, n)}'), 'values': [['', '', '']] * (prev - n)}
+                         for h in range(1, MAX_HOLES + 1) if h not in holes]
+            data.append({'range': a1(self.settings_title, 'A2'), 'values': [[num_participants, num_carts, rev, revision]]})
+            players = [[i, name, cart] for i, (name, cart) in enumerate(zip(names, carts))]
+            if players: data.append({'range': a1(self.players_title, 'A2'), 'values': players})
+        else:
+            data.append({'range': a1(self.settings_title, f"{col_letter(s_cols['revision'])}2"), 'values': [[revision]]})
+        try: sheets.get_pool().workbook().values_batch_update({'valueInputOption': 'RAW', 'data': data})
+        except Exception as e:
+            for title in self.titles: check_schema_drift(title, e)
+            raise
+        if settings: self.players = max([n] + written)
+        elif self.players is not None: self.players = max([self.players] + written)
+
+    # 이 게임의 시트 데이터만 삭제 (헤더 유지), 한 번의 호출로
+    # 전체 리비전 칸도 같이 비워지므로 다른 세션은 다음 동기화 때 바뀐 것을 알아챔
+    def reset(self):
+        sheets.get_pool().workbook().values_batch_clear(body={'ranges': [
+            a1(self.settings_title, f'A2:{SETTINGS_RANGE}'), a1(self.players_title, f'A2:C{player_row(MAX_PLAYERS - 1)}'),
+            a1(self.scores_title, f'A2:{SCORES_RANGE}'), a1(self.strokes_title, f'A2:C{stroke_row(MAX_HOLES, MAX_PLAYERS - 1)}')]})
+        self.players = 0
+
+# ==========================================
+# 로컬 SQLite (WAL)
+# ==========================================
+class SqliteStorage(Storage):
+    name = 'sqlite'
+
+    def __init__(self, path, game=DEFAULT_GAME):
+        self.path = path; self.game = game
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        # revisions.key: 'revision'(전체), 'settings', 또는 홀 번호 문자열
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS settings (game TEXT, key TEXT, value TEXT, PRIMARY KEY (game, key));
+            CREATE TABLE IF NOT EXISTS pars (game TEXT, hole INTEGER, par INTEGER, PRIMARY KEY (game, hole));
+            CREATE TABLE IF NOT EXISTS scores (game TEXT, hole INTEGER, player INTEGER, score INTEGER, PRIMARY KEY (game, hole, player));
+            CREATE TABLE IF NOT EXISTS revisions (game TEXT, key TEXT, rev TEXT, PRIMARY KEY (game, key));
+        ''')
+
+    def _holes(self, where='', args=()):
+        holes = {}
+        for h, par in self.conn.execute(f'SELECT hole, par FROM pars WHERE game=?{where}', (self.game,) + args):
+            holes[h] = {'par': par, 'scores': {}}
+        for h, p, s in self.conn.execute(f'SELECT hole, player, score FROM scores WHERE game=?{where}', (self.game,) + args):
+            holes.setdefault(h, {'par': None, 'scores': {}})['scores'][p] = s
+        return holes
+
+    def _row_revisions(self):
+        revs = dict(self.conn.execute('SELECT key, rev FROM revisions WHERE game=?', (self.game,)).fetchall())
+        return revs.pop('revision', ''), revs.pop('settings', ''), {int(k): v for k, v in revs.items()}
+
+    def _set_rev(self, key, rev):
+        self.conn.execute('INSERT OR REPLACE INTO revisions VALUES (?, ?, ?)', (self.game, key, rev))
+
+    def load(self):
+        with self.lock:
+            settings = dict(self.conn.execute('SELECT key, value FROM settings WHERE game=?', (self.game,)).fetchall()) or None
+            holes = self._holes()
+            revision, settings_rev, hole_revs = self._row_revisions()
+        return settings, holes, {'revision': revision, 'settings': settings_rev, 'holes': hole_revs}
+
+    def revision(self):
+        with self.lock:
+            row = self.conn.execute("SELECT rev FROM revisions WHERE game=? AND key='revision'", (self.game,)).fetchone()
+        return row[0] if row else ''
+
+    def row_revisions(self):
+        with self.lock: return self._row_revisions()[1:]
+
+    def load_holes(self, holes):
+        holes = list(holes)
+        if not holes: return {}
+        with self.lock: return self._holes(f" AND hole IN ({','.join('?' * len(holes))})", tuple(holes))
+
+    # 한 트랜잭션으로 설정/홀들/리비전을 같이 씀
+    def save_batch(self, settings, holes):
+        revs = [v[2] for v in holes.values()] + ([settings[1]] if settings else [])
+        if not revs: return
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                if settings:
+                    rows = [(self.game, k, v) for k, v in settings_map(*settings[0]).items()]
+                    self.conn.execute('DELETE FROM settings WHERE game=?', (self.game,))
+                    self.conn.executemany('INSERT INTO settings VALUES (?, ?, ?)', rows)
+                    self._set_rev('settings', settings[1])
+                for h, (par, scores, rev) in holes.items():
+                    self.conn.execute('INSERT OR REPLACE INTO pars VALUES (?, ?, ?)', (self.game, h, par))
+                    self.conn.execute('DELETE FROM scores WHERE game=? AND hole=? AND player>=?', (self.game, h, len(scores)))
+                    self.conn.executemany('INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)', [(self.game, h, i, sc) for i, sc in enumerate(scores)])
+                    self._set_rev(str(h), rev)
+                self._set_rev('revision', newest(revs))
+                self.conn.execute('COMMIT')
+            except:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def reset(self):
+        with self.lock:
+            self.conn.execute('BEGIN')
+            for table in ('settings', 'pars', 'scores', 'revisions'): self.conn.execute(f'DELETE FROM {table} WHERE game=?', (self.game,))
+            self.conn.execute('INSERT INTO revisions VALUES (?, ?, ?)', (self.game, 'revision', new_revision()))
+            self.conn.execute('COMMIT')
+
+# ==========================================
+# 미러: 주 저장소에 먼저 쓰고, 보조 저장소(시트)에는 백그라운드로 복사
+# ==========================================
+class MirroredStorage(Storage):
+    def __init__(self, primary, mirror):
+        self.primary = primary; self.mirror = mirror
+        self.name = f'{primary.name}+{mirror.name}'
+        self.queue = queue.Queue()
+        self.last_error = None
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def _worker(self):
+        while True:
+            method, args = self.queue.get()
+            try:
+                getattr(self.mirror, method)(*args)
+                self.last_error = None
+            except Exception as e: self.last_error = e
+            finally: self.queue.task_done()
+
+    def pending(self): return self.queue.unfinished_tasks
+
+    def load(self): return self.primary.load()
+    def revision(self): return self.primary.revision()
+    def row_revisions(self): return self.primary.row_revisions()
+    def load_holes(self, holes): return self.primary.load_holes(holes)
+
+    def flush(self, timeout=None): return self.primary.flush(timeout)
+    def write_status(self): return self.primary.write_status()
+    def local_state(self): return self.primary.local_state()
+
+    def save_batch(self, settings, holes):
+        self.primary.save_batch(settings, holes); self.queue.put(('save_batch', (settings, holes)))
+
+    def reset(self):
+        self.primary.reset(); self.queue.put(('reset', ()))
+
+# ==========================================
+# 백그라운드 저장: 저장 요청은 대기열에 넣고 바로 돌아오고, 작업 스레드가 모아서 한 번에 씀
+# 같은 홀을 여러 번 고치면 마지막 값만, 여러 홀은 save_batch 한 번으로 묶임
+# ==========================================
+FLUSH_TIMEOUT = 10.0     # 동기화 전에 밀린 저장을 기다리는 최대 시간(초)
+RETRY_DELAY = 3.0        # 저장 실패 후 다시 시도하기까지(초)
+COALESCE_DELAY = 0.05    # 첫 저장 요청 뒤 이만큼 더 모았다가 씀(초)
+
+# --- 오프라인 저널 ---
+# 모든 저장을 네트워크보다 먼저 로컬 파일(JSON 한 줄씩, append-only)에 남깁니다.
+#   {"op": "settings"|"hole", "key": "게임/행/리비전", ...}  저장 요청
+#   {"op": "ack", "keys": [...]}                            원본에 쓰기 끝남
+#   {"op": "snapshot", ...}                                  원본에서 전체로 읽은 상태
+#   {"op": "reset"}
+# 행(설정 행, 홀 행)을 통째로 덮어쓰므로 멱등 키는 (게임, 행, 리비전) 입니다. 홀 행에 모든 선수 점수가 들어 있음
+COMPACT_LINES = 500      # 이 줄 수를 넘으면 스냅샷 + 못 보낸 저장만 남기고 파일을 다시 씀
+
+def empty_revs(): return {'revision': '', 'settings': '', 'holes': {}}
+
+class Journal:
+    def __init__(self, path, game=DEFAULT_GAME):
+        self.path = path; self.game = game
+        self.lock = threading.Lock()
+        self.settings = None; self.holes = {}; self.revs = empty_revs()
+        self.has_state = False
+        self.pending = {}   # 행('settings' 또는 홀 번호) -> 아직 원본에 안 쓴 마지막 저장 기록
+        self._replay()
+        self._rewrite()
+
+    def _key(self, row, rev): return f'{self.game}/{row}/{rev}'
+
+    def _replay(self):
+        try: f = open(self.path, encoding='utf-8')
+        except FileNotFoundError: return
+        with f:
+            for line in f:
+                try: e = json.loads(line)
+                except ValueError: continue   # 쓰다 끊긴 마지막 줄
+                self._apply(e)
+
+    # 한 줄을 메모리 상태에 반영
+    def _apply(self, e):
+        op = e.get('op')
+        if op == 'snapshot':
+            self.settings = e['settings']
+            self.holes = {int(h): {'par': r['par'], 'scores': {int(p): v for p, v in r['scores'].items()}} for h, r in e['holes'].items()}
+            self.revs = {'revision': e['revs']['revision'], 'settings': e['revs']['settings'], 'holes': {int(h): v for h, v in e['revs']['holes'].items()}}
+            # 아직 못 보낸 로컬 저장은 스냅샷 위에 다시 얹음
+            for p in list(self.pending.values()): self._apply_write(p)
+        elif op in ('settings', 'hole'):
+            self._apply_write(e)
+            self.pending['settings' if op == 'settings' else e['hole']] = e
+        elif op == 'ack':
+            for key in e['keys']:
+                _, row, rev = key.rsplit('/', 2)
+                row = row if row == 'settings' else int(row)
+                p = self.pending.get(row)
+                if p is not None and int(p['rev']) <= int(rev): del self.pending[row]
+        elif op == 'reset':
+            self.settings = None; self.holes = {}; self.revs = empty_revs(); self.pending = {}
+        else: return
+        self.has_state = True
+
+    def _apply_write(self, e):
+        rev = e['rev']
+        if e['op'] == 'settings':
+            self.settings = settings_map(*e['args']); self.revs['settings'] = rev
+        else:
+            self.holes[e['hole']] = {'par': e['par'], 'scores': dict(enumerate(e['scores']))}; self.revs['holes'][e['hole']] = rev
+        self.revs['revision'] = local_revision(rev)
+
+    def _write(self, entries, sync=True):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for e in entries: f.write(json.dumps(e, ensure_ascii=False) + '\n')
+            f.flush()
+            if sync: os.fsync(f.fileno())
+        self.lines += len(entries)
+        if self.lines > COMPACT_LINES: self._rewrite()
+
+    # 스냅샷 한 줄 + 못 보낸 저장만 남긴 새 파일로 바꿔치기
+    def _rewrite(self):
+        entries = [self._snapshot_entry()] + list(self.pending.values()) if self.has_state else []
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for e in entries: f.write(json.dumps(e, ensure_ascii=False) + '\n')
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.lines = len(entries)
+
+    # 스냅샷에는 로컬 저장이 얹히기 전 상태가 아니라 현재 상태를 그대로 넣고, 다시 읽을 때 못 보낸 저장이 한 번 더 얹힘 (덮어쓰기라 결과 같음)
+    def _snapshot_entry(self):
+        return {'op': 'snapshot', 'settings': self.settings, 'holes': self.holes, 'revs': self.revs}
+
+    def append(self, settings, holes):
+        entries = []
+        if settings is not None:
+            entries.append({'op': 'settings', 'key': self._key('settings', settings[1]), 'rev': settings[1], 'args': list(settings[0])})
+        for h, (par, scores, rev) in sorted(holes.items()):
+            entries.append({'op': 'hole', 'key': self._key(h, rev), 'hole': h, 'par': par, 'scores': list(scores), 'rev': rev})
+        with self.lock:
+            for e in entries: self._apply(e)
+            self._write(entries)
+
+    # 원본 쓰기가 끝난 기록 표시 (잃어버려도 다시 보낼 뿐이라 fsync 생략)
+    def ack(self, settings, holes):
+        keys = [self._key(h, v[2]) for h, v in holes.items()]
+        if settings is not None: keys.append(self._key('settings', settings[1]))
+        if not keys: return
+        e = {'op': 'ack', 'keys': keys}
+        with self.lock:
+            self._apply(e); self._write([e], sync=False)
+
+    def snapshot(self, settings, holes, revs):
+        e = {'op': 'snapshot', 'settings': settings, 'holes': holes, 'revs': revs}
+        with self.lock:
+            self._apply(json.loads(json.dumps(e))); self._write([e], sync=False)
+
+    def reset(self):
+        with self.lock:
+            self._apply({'op': 'reset'}); self._rewrite()
+
+    # 재시작 때 다시 보낼 것: (설정 (args, rev) 또는 None, {hole: (par, scores, rev)})
+    def pending_batch(self):
+        with self.lock:
+            p = self.pending.get('settings')
+            settings = (tuple(p['args']), p['rev']) if p else None
+            holes = {h: (e['par'], e['scores'], e['rev']) for h, e in self.pending.items() if h != 'settings'}
+        return settings, holes
+
+    def state(self):
+        with self.lock:
+            if not self.has_state: return None
+            return (dict(self.settings) if self.settings else None), copy_holes(self.holes), \
+                {'revision': self.revs['revision'], 'settings': self.revs['settings'], 'holes': dict(self.revs['holes'])}
+
+class BackgroundWriter(Storage):
+    def __init__(self, inner, retry_delay=RETRY_DELAY, journal=None):
+        self.inner = inner; self.retry_delay = retry_delay; self.journal = journal
+        self.name = f'{inner.name}(bg)'
+        self.cond = threading.Condition()
+        self.settings = None   # 대기 중인 설정 (args, rev)
+        self.holes = {}        # 대기 중인 홀 {hole: (par, scores, rev)}
+        self.inflight = 0      # 작업 스레드가 쓰고 있는 건수
+        self.last_error = None
+        self.replaying = False # 재시작/실패 뒤 다시 보내는 중이면 원본이 더 새로운 행은 건너뜀
+        self.stats = {'batches': 0, 'writes': 0, 'skipped': 0}
+        # 지난번에 못 보낸 저장은 저널에서 꺼내 다시 보냄
+        if journal is not None:
+            self.settings, self.holes = journal.pending_batch()
+            self.replaying = self._pending() > 0
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def _pending(self): return (self.settings is not None) + len(self.holes) + self.inflight
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                while self.settings is None and not self.holes: self.cond.wait()
+            time.sleep(COALESCE_DELAY)
+            with self.cond:
+                settings, holes = self.settings, self.holes
+                self.settings = None; self.holes = {}
+                self.inflight = (settings is not None) + len(holes)
+            try:
+                todo_settings, todo_holes = self._skip_applied(settings, holes) if self.replaying else (settings, holes)
+                self.inner.save_batch(todo_settings, todo_holes); err = None
+                if self.journal is not None: self.journal.ack(settings, holes)
+            except Exception as e: err = e
+            with self.cond:
+                self.inflight = 0
+                if err is None:
+                    self.last_error = None; self.replaying = False
+                    self.stats['batches'] += 1; self.stats['writes'] += (todo_settings is not None) + len(todo_holes)
+                else:
+                    # 실패분은 다시 대기열로 (그 사이 새로 들어온 값이 우선)
+                    self.last_error = err; self.replaying = True
+                    if self.settings is None: self.settings = settings
+                    for h, v in holes.items(): self.holes.setdefault(h, v)
+                self.cond.notify_all()
+            if err is not None: time.sleep(self.retry_delay)
+
+    # 이미 원본에 들어갔거나 원본 쪽이 더 새로운 행은 빼고 보냄 (행 리비전 = 멱등 키)
+    def _skip_applied(self, settings, holes):
+        settings_rev, hole_revs = self.inner.row_revisions()
+        def applied(remote, rev):
+            try: return int(remote) >= int(rev)
+            except (TypeError, ValueError): return False
+        if settings is not None and applied(settings_rev, settings[1]): settings = None; self.stats['skipped'] += 1
+        keep = {h: v for h, v in holes.items() if not applied(hole_revs.get(h), v[2])}
+        self.stats['skipped'] += len(holes) - len(keep)
+        return settings, keep
+
+    def save_batch(self, settings, holes):
+        # 네트워크보다 먼저 로컬 저널에 남김 (앱이 꺼져도 다음에 다시 보냄)
+        if self.journal is not None: self.journal.append(settings, holes)
+        with self.cond:
+            if settings is not None: self.settings = settings
+            self.holes.update(holes)
+            self.cond.notify_all()
+
+    def flush(self, timeout=None):
+        with self.cond: return self.cond.wait_for(lambda: self._pending() == 0, FLUSH_TIMEOUT if timeout is None else timeout)
+
+    def write_status(self):
+        with self.cond: return {'pending': self._pending(), 'error': str(self.last_error) if self.last_error else None}
+
+    # 읽기 전에 밀린 저장부터 끝냄 (안 그러면 방금 저장한 값이 옛 값으로 덮임)
+    def _flushed(self):
+        if not self.flush(): raise RuntimeError(f"저장 대기 중인 기록 {self.write_status()['pending']}건이 아직 저장되지 않았습니다")
+        return self.inner
+
+    def load(self):
+        data = self._flushed().load()
+        if self.journal is not None: self.journal.snapshot(*data)
+        return data
+
+    def local_state(self): return self.journal.state() if self.journal is not None else None
+    def revision(self): return self._flushed().revision()
+    def row_revisions(self): return self._flushed().row_revisions()
+    def load_holes(self, holes): return self._flushed().load_holes(holes)
+
+    # 초기화는 밀린 저장을 버리고 바로 실행
+    # 보내는 중이던 묶음이 실패하면 작업 스레드가 대기열에 되돌려 놓으므로, 끝나길 기다린 뒤 한 번 더 비움
+    def reset(self):
+        with self.cond:
+            self.settings = None; self.holes = {}
+            self.cond.wait_for(lambda: self.inflight == 0, FLUSH_TIMEOUT)
+            self.settings = None; self.holes = {}
+            self.last_error = None; self.replaying = False
+        if self.journal is not None: self.journal.reset()
+        self.inner.reset()
+
+# ==========================================
+# 쓰기 조정: 이 프로세스(서버)에서 한 게임으로 가는 모든 세션의 저장을 한 줄로 세우고, 칸 단위로 합침
+# 홀 행은 통째로 쓰지만, 행 내용은 칸(선수 점수, 파)마다 비교 후 바꾸기(compare-and-set)로 만듭니다.
+#   세션이 손댄 칸:     세션이 보던 값(base)이 지금 값과 같을 때만 바꿈. 다르면 남이 먼저 고친 것이라 그대로 두고 충돌로 알림
+#   손대지 않은 칸:     화면 기본값(저장된 값, 없으면 파 / 파는 4) 그대로인 칸. 비었거나 기본값으로 채운 칸만 채우고, 아니면 그대로
+# 그래서 같은 홀에서 서로 다른 선수를 고친 두 카트의 저장은 서로 덮어쓰지 않고, 다시 읽고 재시도할 필요도 없습니다.
+# 기본값으로 채운 칸은 '약한 값'으로 기억해 두고, 나중에 다른 세션이 실제로 고치면 그 값이 이깁니다.
+# 다른 프로세스(서버)에서 쓴 값은 전체 읽기(load) 때 행 리비전이 더 새로우면 받아들입니다.
+# ==========================================
+DEFAULT_PAR = 4
+
+def rev_value(rev):
+    try: return int(rev)
+    except (TypeError, ValueError): return 0
+
+class WriteCoordinator(Storage):
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = f'{inner.name}(cas)'
+        self.lock = threading.Lock()
+        self.rows = {}      # hole -> {'par', 'scores': {선수: 점수}, 'rev'} 이 프로세스가 아는 마지막 행
+        self.weak = set()   # (hole, 선수 번호 또는 'par'): 기본값으로 채운 칸
+        self.stats = {'merged': 0, 'conflicts': 0}
+
+    def flush(self, timeout=None): return self.inner.flush(timeout)
+    def write_status(self): return self.inner.write_status()
+    def local_state(self): return self.inner.local_state()
+    def revision(self): return self.inner.revision()
+    def row_revisions(self): return self.inner.row_revisions()
+    def load_holes(self, holes): return self.inner.load_holes(holes)
+
+    # 읽은 행이 아는 것보다 새로우면 (다른 서버가 쓴 값) 받아들이고, 그 홀의 약한 값 표시는 버림
+    # 읽는 사이 이 프로세스에서 새로 쓴 행은 건드리지 않음
+    def load(self):
+        started = rev_value(new_revision())
+        data = self.inner.load()
+        _, holes, revs = data
+        with self.lock:
+            for h, rec in holes.items():
+                rev = revs['holes'].get(h, '')
+                known = self.rows.get(h)
+                if known is not None and rev_value(known['rev']) >= rev_value(rev): continue
+                self.rows[h] = {'par': rec['par'], 'scores': dict(rec['scores']), 'rev': rev}
+                self.weak = {k for k in self.weak if k[0] != h}
+            for h in [h for h, known in self.rows.items() if h not in holes and rev_value(known['rev']) < started]:
+                del self.rows[h]
+        return data
+
+    # 행 전체 쓰기 (설정 저장, 조정 없는 save_hole): 쓴 행을 그대로 기억
+    def save_batch(self, settings, holes):
+        with self.lock:
+            self.inner.save_batch(settings, holes)
+            for h, (par, scores, rev) in holes.items():
+                self.rows[h] = {'par': par, 'scores': dict(enumerate(scores)), 'rev': rev}
+                self.weak = {k for k in self.weak if k[0] != h}
+
+    # 이 프로세스에서 아직 못 본 홀: 잠금 밖에서 그 행만 읽음 (읽는 동안 다른 세션 저장을 막지 않게)
+    # 밀린 저장이 있으면(오프라인, 대기열) 읽기가 flush 를 기다리므로 읽지 않고 세션이 본 값을 지금 값으로 씀
+    def _unseen(self, hole_num, base):
+        try:
+            if self.inner.write_status()['pending']: return base
+            return self.inner.load_holes([hole_num]).get(hole_num)
+        except Exception: return base
+
+    def _current(self, hole_num, fetched):
+        row = self.rows.get(hole_num)
+        if row is not None: return row
+        rec = fetched or {'par': None, 'scores': {}}
+        return {'par': rec['par'], 'scores': dict(rec['scores']), 'rev': ''}
+
+    # 칸 하나 비교 후 바꾸기: (쓸 값, 충돌 여부)
+    def _cell(self, key, cur, new, base, default):
+        if new == (base or default):
+            if cur is None or key in self.weak: self.weak.add(key); return new, False
+            return cur, False
+        if cur is None or cur == base or cur == new or key in self.weak:
+            self.weak.discard(key); return new, False
+        return cur, True
+
+    def merge_hole(self, hole_num, par, scores_list, base=None):
+        base = base or {'par': None, 'scores': {}}
+        conflicts = []
+        fetched = base if hole_num in self.rows else self._unseen(hole_num, base)
+        with self.lock:
+            cur = self._current(hole_num, fetched)
+            new_par, bad = self._cell((hole_num, 'par'), cur['par'], par, base['par'], DEFAULT_PAR)
+            if bad: conflicts.append('par')
+            merged = []
+            for i, s in enumerate(scores_list):
+                v, bad = self._cell((hole_num, i), cur['scores'].get(i), s, base['scores'].get(i), par)
+                if bad: conflicts.append(i)
+                merged.append(v)
+            rev = new_revision()
+            self.inner.save_batch(None, {hole_num: (new_par, merged, rev)})
+            self.rows[hole_num] = {'par': new_par, 'scores': dict(enumerate(merged)), 'rev': rev}
+            self.stats['merged'] += 1; self.stats['conflicts'] += len(conflicts)
+        return rev, new_par, merged, conflicts
+
+    def reset(self):
+        with self.lock:
+            self.inner.reset()
+            self.rows = {}; self.weak = set()
+
+# ==========================================
+# 세션 공용 읽기 캐시: 여러 휴대폰(세션)이 동기화해도 TTL 동안 원본 읽기는 한 번
+# 이 프로세스를 거친 쓰기는 캐시에 바로 반영하고, 다른 곳에서 쓴 변경은 TTL 이 지나면 보임
+# ==========================================
+DEFAULT_CACHE_TTL = 5.0
+
+class CachedStorage(Storage):
+    def __init__(self, inner, ttl=DEFAULT_CACHE_TTL):
+        self.inner = inner; self.ttl = ttl
+        self.name = f'{inner.name}(cache)'
+        self.lock = threading.Lock()
+        self.data = None      # (settings, holes, revs)
+        self.source_rev = None  # 마지막 전체 읽기 때 원본의 전체 리비전 (이 프로세스 저장으로 바뀌지 않음)
+        self.loaded_at = 0.0
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0}
+
+    def invalidate(self):
+        with self.lock: self.data = None
+
+    def flush(self, timeout=None): return self.inner.flush(timeout)
+    def write_status(self): return self.inner.write_status()
+    def local_state(self): return self.inner.local_state()
+
+    # 만료되면 원본의 전체 리비전(셀 하나)부터 보고, 그대로면 만료 시간만 다시 시작
+    # 바뀌었거나 리비전을 못 쓰는 원본이면 전체를 다시 읽음. 동시에 들어온 세션은 락에서 기다렸다가 새 값을 씀
+    def _fresh(self):
+        if self.data is not None and time.monotonic() - self.loaded_at < self.ttl:
+            self.stats['hits'] += 1
+            return self.data
+        if self.data is not None and self.source_rev is not None and self.inner.revision() == self.source_rev:
+            self.stats['revalidated'] += 1
+            self.loaded_at = time.monotonic()
+            return self.data
+        self.stats['misses'] += 1
+        self.data = self.inner.load(); self.loaded_at = time.monotonic()
+        self.source_rev = self.data[2]['revision'] or None
+        return self.data
+
+    # 세션마다 받은 값을 고쳐 쓰므로 항상 복사본을 돌려줌
+    def load(self):
+        with self.lock:
+            settings, holes, revs = self._fresh()
+            return (dict(settings) if settings else None), copy_holes(holes), {'revision': revs['revision'], 'settings': revs['settings'], 'holes': dict(revs['holes'])}
+
+    def revision(self):
+        with self.lock: return self._fresh()[2]['revision']
+
+    def row_revisions(self):
+        with self.lock:
+            revs = self._fresh()[2]
+            return revs['settings'], dict(revs['holes'])
+
+    def load_holes(self, holes):
+        with self.lock:
+            cached = self._fresh()[1]
+            return copy_holes({h: cached[h] for h in holes if h in cached})
+
+    def save_settings(self, num_participants, num_carts, names, carts):
+        rev = self.inner.save_settings(num_participants, num_carts, names, carts)
+        with self.lock:
+            if self.data is not None:
+                _, holes, revs = self.data
+                settings = settings_map(num_participants, num_carts, names, carts)
+                revs['settings'] = rev; revs['revision'] = local_revision(rev)
+                self.data = (settings, holes, revs)
+        return rev
+
+    def save_hole(self, hole_num, par, scores_list):
+        rev = self.inner.save_hole(hole_num, par, scores_list)
+        with self.lock:
+            if self.data is not None:
+                _, holes, revs = self.data
+                holes[hole_num] = {'par': par, 'scores': dict(enumerate(scores_list))}
+                revs['holes'][hole_num] = rev; revs['revision'] = local_revision(rev)
+        return rev
+
+    def merge_hole(self, hole_num, par, scores_list, base=None):
+        rev, par, merged, conflicts = self.inner.merge_hole(hole_num, par, scores_list, base)
+        with self.lock:
+            if self.data is not None:
+                _, holes, revs = self.data
+                holes[hole_num] = {'par': par, 'scores': dict(enumerate(merged))}
+                revs['holes'][hole_num] = rev; revs['revision'] = local_revision(rev)
+        return rev, par, merged, conflicts
+
+    def reset(self):
+        try: self.inner.reset()
+        finally: self.invalidate()
+
+# 게임별 저널 파일: 기본 게임은 설정한 경로 그대로, 나머지는 journal-<코드>.jsonl
+def journal_path(path, game=DEFAULT_GAME):
+    if game == DEFAULT_GAME: return path
+    root, ext = os.path.splitext(path)
+    return f'{root}-{game}{ext}'
+
+def storage_config():
+    try: return dict(st.secrets.get("storage", {}))
+    except Exception: return {}
+
+# 게임마다 저장소 체인 하나 (프로세스 공용, 게임 코드별로 캐시)
+@st.cache_resource(show_spinner=False)
+def get_storage(game=DEFAULT_GAME):
+    cfg = storage_config()
+    if cfg.get('backend', 'sheets') == 'sqlite':
+        path = os.path.join(APP_DIR, cfg.get('path', 'golf.db'))
+        store = SqliteStorage(path, game)
+        if cfg.get('mirror_sheets'): store = MirroredStorage(store, SheetsStorage(game))
+    else: store = SheetsStorage(game)
+    if cfg.get('write_behind', True):
+        path = cfg.get('journal', 'journal.jsonl')
+        journal = Journal(journal_path(os.path.join(APP_DIR, path), game), game) if path else None
+        store = BackgroundWriter(store, journal=journal)
+    store = WriteCoordinator(store)
+    ttl = float(cfg.get('cache_ttl', DEFAULT_CACHE_TTL))
+    return CachedStorage(store, ttl) if ttl > 0 else store
@@ -1,6 +1,5 @@
 import streamlit as st
 import logic
-import pandas as pd
 
 def apply_mobile_style():
     st.markdown("""
@@ -20,18 +19,60 @@ def show_sync_button():
         logic.sync_data()
         st.toast("구글 시트 동기화 완료!", icon="✅")
         st.rerun()
+    show_write_status()
+
+# 백그라운드 저장이 밀려 있거나 실패 중이면 표시 (실패분은 자동으로 다시 시도됨)
+def show_write_status():
+    status = logic.write_status()
+    if status['error']: st.warning(f"⚠️ 저장 실패 {status['pending']}건, 다시 시도 중: {status['error']}")
+    elif status['pending']: st.caption(f"⏳ 저장 중 {status['pending']}건")
+
+# --- 실시간 갱신 ---
+# 켜져 있으면 화면의 일부 조각(fragment)만 logic.LIVE_INTERVAL 초마다 다시 돌면서 리비전만 확인합니다.
+# 끄면 조각은 화면을 그릴 때만 돌고, 동기화 버튼으로만 새 점수를 받습니다.
+def live_interval(): return logic.LIVE_INTERVAL if st.session_state.get('live_mode', True) else None
+
+def show_live_caption():
+    if live_interval(): st.caption(f"📡 실시간 갱신 중 ({logic.LIVE_INTERVAL}초마다)")
+
+# 점수 입력 화면: 다른 홀이 바뀌면 세션 상태만 고치고 (화면에 안 보임),
+# 지금 보고 있는 홀이나 설정이 바뀌었을 때만 입력창을 새 값으로 그리려고 전체 화면을 다시 그림
+def live_watch(hole_num):
+    changed = logic.live_sync()
+    if changed is None or hole_num in changed: st.rerun(scope="app")
+    show_live_caption()
+
+# 지금 게임 코드와 다른 게임 참가 / 새 게임 만들기 (조마다 코드 하나)
+def game_label(): return "기본 게임" if logic.game_id() == logic.storage.DEFAULT_GAME else logic.game_id()
+
+def show_game_picker():
+    with st.expander(f"🎫 게임 코드: {game_label()}"):
+        st.caption("같은 조는 같은 코드로 들어오세요. 조마다 따로 저장됩니다.")
+        code = st.text_input("게임 코드", key="ui_game_code", placeholder="예: K7P2Q")
+        c_join, c_new = st.columns(2)
+        with c_join:
+            if st.button("참가", use_container_width=True) and logic.join_game(code): st.rerun()
+        with c_new:
+            if st.button("새 게임 만들기", use_container_width=True):
+                logic.new_game(); st.rerun()
 
 def sidebar_menu():
     with st.sidebar:
+        st.caption(f"🎫 게임 코드: {game_label()}")
+        st.toggle("📡 실시간 갱신", value=True, key="live_mode")
         st.header("📂 파일 관리")
         if hasattr(logic, 'export_game_data'):
             st.download_button("💾 상태 저장", logic.export_game_data(), "golf.json", "application/json")
+        metrics = logic.api_metrics()
+        if metrics:
+            with st.expander("📈 시트 API 사용량"): st.json(metrics)
 
 def show_setup_screen():
     apply_mobile_style()
     sidebar_menu() 
     
     st.title("⛳️ 골프 내기 정산(by 한유신)")
+    show_game_picker()
     show_sync_button()
     
     saved_p = st.session_state.game_info.get('participants_count', 4)
@@ -39,8 +80,8 @@ def show_setup_screen():
     
     # 인원 및 카트 수
     col1, col2 = st.columns(2)
-    with col1: num_p = st.number_input("참가 인원 (최대 12)", 1, 12, saved_p, 1, key="ui_num_p")
-    with col2: num_c = st.number_input("카트 수 (최대 3)", 1, 3, saved_c, 1, key="ui_num_c")
+    with col1: num_p = st.number_input(f"참가 인원 (최대 {logic.MAX_PLAYERS})", 1, logic.MAX_PLAYERS, saved_p, 1, key="ui_num_p")
+    with col2: num_c = st.number_input(f"카트 수 (최대 {logic.MAX_CARTS})", 1, logic.MAX_CARTS, saved_c, 1, key="ui_num_c")
     
     # 라운드 리셋 버튼 (오른쪽 정렬)
     _, col_reset_btn = st.columns([2, 1])
@@ -72,7 +113,7 @@ def show_setup_screen():
     for i in range(num_p):
         c1, c2 = st.columns([2.5, 1.5])
         with c1:
-            def_name = st.session_state.players[i]['name'] if i < len(st.session_state.players) else ""
+            def_name = st.session_state.round.names[i] if i < len(st.session_state.round) else ""
             name = st.text_input(f"이름{i+1}", value=def_name, key=f"name_{i}", label_visibility="collapsed")
         with c2:
             if f"cart_{i}" not in st.session_state: 
@@ -81,6 +122,7 @@ def show_setup_screen():
             cart = st.number_input(f"카트{i+1}", 1, num_c, key=f"cart_{i}", label_visibility="collapsed")
         input_names.append(name); input_carts.append(cart)
 
+    show_stake_simulator(input_names)
     st.markdown("---")
     
     if st.button("게임 시작 (설정 저장) ▶", use_container_width=True):
@@ -88,12 +130,33 @@ def show_setup_screen():
         st.session_state.step = 2
         st.rerun()
 
+# 핸디캡별 예상 손익 (지금 규칙에서 금액만 바꿔 보기). 결과는 다시 누를 때까지 유지
+def show_stake_simulator(names):
+    with st.expander("🎲 내기 시뮬레이션 (핸디캡별 예상 손익)"):
+        rules = logic.get_rules()
+        c1, c2, c3 = st.columns(3)
+        with c1: stake = st.number_input("타당 금액", 0, 100000, rules.base_stake, 500, key="sim_stake")
+        with c2: mult = st.number_input("배판 배수", 1, 10, rules.multiplier, 1, key="sim_mult")
+        with c3: bonus = st.number_input("보너스", 0, 100000, rules.bonus_amount, 500, key="sim_bonus")
+        labels = [name or f"선수{i+1}" for i, name in enumerate(names)]
+        hcps = [st.number_input(f"{label} 핸디캡", 0, 54, 18, 1, key=f"sim_hcp_{i}") for i, label in enumerate(labels)]
+        if st.button("시뮬레이션 실행", use_container_width=True):
+            with st.spinner("라운드 뽑는 중..."):
+                st.session_state.sim_result = logic.simulate_stakes(labels, hcps, stake, mult, bonus)
+        res = st.session_state.get('sim_result')
+        if res is None: return
+        import pandas as pd
+        df = pd.DataFrame(res.rows())
+        st.dataframe(df.style.format("{:,}", subset=list(df.select_dtypes('number').columns)), use_container_width=True, hide_index=True)
+        st.caption(f"{res.rounds:,}라운드 기준, 배판 홀 {res.baepan_rate:.1%}, 계산 {res.seconds:.1f}초. 하위 5% = 운 나쁜 20판 중 1판")
+
 def show_score_screen():
     apply_mobile_style()
     sidebar_menu()
     
     st.title("📝 점수 입력")
     show_sync_button()
+    st.fragment(live_watch, run_every=live_interval())(st.session_state.game_info['current_hole'])
     
     hole_options = list(range(1, 19))
     current_idx = st.session_state.game_info['current_hole'] - 1
@@ -106,52 +169,25 @@ def show_score_screen():
             st.rerun()
     with c2:
         par_options = [3, 4, 5, 6]
-        saved_par = st.session_state.game_info['pars'].get(selected_hole, 4)
+        saved_par = st.session_state.round.par(selected_hole)
         try: default_idx = par_options.index(saved_par)
         except ValueError: default_idx = 1
         par = st.selectbox("Par", options=par_options, index=default_idx, key=f"par_select_{selected_hole}")
     
     if st.button("🔄 이 홀 점수 리셋 (0)", use_container_width=True):
-        for p in st.session_state.players:
-            p['scores'][selected_hole] = par
-            widget_key = f"score_rel_{selected_hole}_{p['id']}"
-            st.session_state[widget_key] = 0
+        logic.reset_hole_scores(selected_hole, par)
+        for i in range(len(st.session_state.round)):
+            st.session_state[score_key(selected_hole, i)] = 0
         st.toast("초기화 완료!", icon="↩️")
         st.rerun()
 
     st.markdown("---")
+    rnd = st.session_state.round
     with st.container(height=500, border=False):
-        score_options = list(range(6, -4, -1))
-        def format_score(s): return f"+{s}" if s > 0 else ("0 (Par)" if s == 0 else f"{s}")
-
-        players = st.session_state.players
-        cart_ids = sorted(list(set(p['cart'] for p in players)))
-        temp_score_map = {} 
-
-        for cid in cart_ids:
-            st.info(f"🛒 **카트 {cid}**")
-            cart_players = [p for p in players if p['cart'] == cid]
-            for p in cart_players:
-                c1, c2 = st.columns([2, 1.5])
-                with c1: st.write(f"**{p['name']}**")
-                with c2:
-                    saved_abs_score = p['scores'].get(selected_hole, 0)
-                    default_rel = saved_abs_score - par if saved_abs_score != 0 else 0
-                    if default_rel not in score_options: default_rel = 0
-                    
-                    widget_key = f"score_rel_{selected_hole}_{p['id']}"
-                    if widget_key not in st.session_state:
-                        st.session_state[widget_key] = default_rel
-                    
-                    selected_rel = st.selectbox(
-                        f"{p['name']} 점수", options=score_options, format_func=format_score,
-                        key=widget_key, label_visibility="collapsed"
-                    )
-                    temp_score_map[p['id']] = par + selected_rel
-            st.write("") 
-
-    final_scores = [temp_score_map[p['id']] for p in players]
-    
+        # 카트마다 따로 다시 도는 조각: 점수 하나를 바꾸면 그 카트의 입력창만 다시 그림 (페이지 전체 X)
+        for cid in rnd.cart_ids():
+            st.fragment(show_cart_scores)(cid, selected_hole, par)
+
     st.markdown("---")
     b_col1, b_col2 = st.columns(2)
     with b_col1:
@@ -159,9 +195,37 @@ def show_score_screen():
             st.session_state.step = 1; st.rerun()
     with b_col2:
         if st.button("정산 하기 (저장) ▶", use_container_width=True):
+            # 저장할 때만 각 카트 입력창 값(세션 상태)을 모아서 한 번에 씀
+            final_scores = [par + st.session_state.get(score_key(selected_hole, i), 0) for i in range(len(rnd))]
             logic.update_scores(selected_hole, par, final_scores)
             st.session_state.step = 3; st.rerun()
 
+SCORE_OPTIONS = list(range(6, -4, -1))
+def format_score(s): return f"+{s}" if s > 0 else ("0 (Par)" if s == 0 else f"{s}")
+def score_key(hole_num, pid): return f"score_rel_{hole_num}_{pid}"
+
+# 카트 하나의 점수 입력창 (파 기준 상대 점수). 값은 입력창 키로 세션 상태에만 남고 저장 버튼이 모아 감
+def show_cart_scores(cid, hole_num, par):
+    st.info(f"🛒 **카트 {cid}**")
+    rnd = st.session_state.round
+    for i in rnd.cart_players(cid):
+        c1, c2 = st.columns([2, 1.5])
+        with c1: st.write(f"**{rnd.names[i]}**")
+        with c2:
+            saved_abs_score = rnd.score(i, hole_num)
+            default_rel = saved_abs_score - par if saved_abs_score != 0 else 0
+            if default_rel not in SCORE_OPTIONS: default_rel = 0
+
+            widget_key = score_key(hole_num, i)
+            if widget_key not in st.session_state:
+                st.session_state[widget_key] = default_rel
+
+            st.selectbox(
+                f"{rnd.names[i]} 점수", options=SCORE_OPTIONS, format_func=format_score,
+                key=widget_key, label_visibility="collapsed"
+            )
+    st.write("")
+
 def show_result_screen():
     apply_mobile_style()
     sidebar_menu()
@@ -169,9 +233,23 @@ def show_result_screen():
     current_hole = st.session_state.game_info['current_hole']
     st.title(f"⛳️ {current_hole}번홀 정산")
     show_sync_button()
+    st.fragment(show_standings, run_every=live_interval())(current_hole)
     
-    df_hole, is_baepan, reasons = logic.calculate_settlement(current_hole)
-    if is_baepan: st.error(f"🚨 **배판! (x{logic.BAEPAN_MULTIPLIER})**"); [st.caption(f"• {r}") for r in reasons]
+    st.markdown("---")
+    if st.button("◀ 뒤로 (점수 수정/홀 이동)", use_container_width=True):
+        st.session_state.step = 2; st.rerun()
+    if current_hole == 18: st.balloons(); st.success("🎉 경기 종료!")
+
+# 배판 여부, 이번 홀 결과, 누적, 송금 내역 (실시간 갱신 때는 이 조각만 다시 그림)
+# 바뀐 게 없으면 상태 버전이 그대로라 정산 스냅샷도 다시 계산하지 않음
+def show_standings(current_hole):
+    logic.live_sync()
+    show_live_caption()
+    # pandas 는 결과 화면을 처음 그릴 때만 불러옵니다 (콜드 스타트 단축)
+    import pandas as pd
+    snap = logic.get_snapshot(current_hole)
+    df_hole, is_baepan, reasons = pd.DataFrame(snap.hole_rows), snap.is_baepan, snap.reasons
+    if is_baepan: st.error(f"🚨 **배판! (x{logic.get_rules().multiplier})**"); [st.caption(f"• {r}") for r in reasons]
     else: st.success("✅ 평범한 판")
 
     st.markdown("---")
@@ -181,20 +259,15 @@ def show_result_screen():
         
         st.markdown("---")
         st.subheader(f"🏆 누적 ({current_hole}홀 까지)")
-        df_total = logic.get_total_settlement()
+        df_total = pd.DataFrame(snap.total_rows)
         if not df_total.empty:
             st.dataframe(df_total.sort_values(by='누적금액', ascending=False).style.format({"누적금액": "{:,}"}).set_properties(**{'font-size': '16px', 'text-align': 'center', 'font-weight': 'bold'}), use_container_width=True, hide_index=True)
         
         st.markdown("---")
         st.subheader("💸 최종 송금 내역")
-        transfers = logic.calculate_transfer_details()
+        transfers = snap.transfers
         if transfers:
             df_tr = pd.DataFrame(transfers)
             df_tr['내역'] = df_tr.apply(lambda x: f"{x['보내는사람']} ➡️ {x['받는사람']}", axis=1)
             st.dataframe(df_tr[['내역', '금액']].style.format({"금액": "{:,}"}).set_properties(**{'font-size': '16px'}), use_container_width=True, hide_index=True)
-        else: st.caption("정산 내역 없음")
-    
-    st.markdown("---")
-    if st.button("◀ 뒤로 (점수 수정/홀 이동)", use_container_width=True):
-        st.session_state.step = 2; st.rerun()
-    if current_hole == 18: st.balloons(); st.success("🎉 경기 종료!")
\ No newline at end of file
+        else: st.caption("정산 내역 없음")
\ No newline at end of file
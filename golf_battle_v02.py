@@ -1,6 +1,12 @@
+import os
+import sys
 import streamlit as st
 import pandas as pd
 
+# 정산 코어(engine.py)는 golf_battle_V02 앱과 같이 씁니다
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golf_battle_V02'))
+from engine import WINNERS_RULESET, min_transfers
+
 # ==========================================
 # [Model] 데이터 및 게임 로직
 # ==========================================
@@ -21,75 +27,21 @@ class GolfGame:
     def add_player(self, name):
         self.players.append(Player(name))
 
+    # 정산은 engine 의 승자 배판 규칙(배판일 때만 최저타가 타수 차이를 받음)으로
     def calculate_hole(self, scores):
-        logs = []
-        min_score = min(scores.values())
-        winners = [p for p, s in scores.items() if s == min_score]
-        
-        is_baepan = False
-        reasons = []
-
-        if any(s < self.current_par for s in scores.values()):
-            is_baepan = True
-            reasons.append("언더파 발생")
-        if any(s >= self.current_par + 3 for s in scores.values()):
-            is_baepan = True
-            reasons.append("트리플보기 이상")
-        if self.current_par == 3 and any(s >= 5 for s in scores.values()):
-            is_baepan = True
-            reasons.append("파3 더블보기 이상")
-
-        score_counts = {}
-        for s in scores.values():
-            score_counts[s] = score_counts.get(s, 0) + 1
-        max_tie_count = max(score_counts.values())
-        if max_tie_count > (len(self.players) / 2):
-            is_baepan = True
-            reasons.append(f"동타 인원 과반({max_tie_count}명)")
-
+        m_str, m_bon, is_baepan, reasons = WINNERS_RULESET.settle_hole(list(scores.values()), self.current_par)
         round_ledger = {p: 0 for p in self.players}
-
-        if is_baepan:
-            logs.append(f"🚨 [배판 성립] {', '.join(reasons)}")
-            for p, score in scores.items():
-                if p not in winners:
-                    diff = score - min_score
-                    amount_per_winner = diff * 1000 
-                    for w in winners:
-                        round_ledger[p] -= amount_per_winner
-                        round_ledger[w] += amount_per_winner
-        else:
-            logs.append("ℹ️ 배판 조건 없음")
-
-        for p, score in scores.items():
-            if score < self.current_par:
-                bonus_amt = 2000
-                for other in self.players:
-                    if other != p:
-                        round_ledger[other] -= bonus_amt
-                        round_ledger[p] += bonus_amt
+        for p, a, b in zip(scores, m_str, m_bon): round_ledger[p] += a + b
+        logs = [f"🚨 [배판 성립] {', '.join(reasons)}" if is_baepan else "ℹ️ 배판 조건 없음"]
 
         transactions = self.simplify_transactions(round_ledger)
         return round_ledger, transactions, logs
 
     def simplify_transactions(self, ledger):
-        receivers = []
-        senders = []
-        for p, amount in ledger.items():
-            if amount > 0: receivers.append({'player': p, 'amount': amount})
-            elif amount < 0: senders.append({'player': p, 'amount': -amount})
-        receivers.sort(key=lambda x: x['amount'], reverse=True)
-        senders.sort(key=lambda x: x['amount'], reverse=True)
+        players = list(ledger)
         trans_list = []
-        r_idx, s_idx = 0, 0
-        while r_idx < len(receivers) and s_idx < len(senders):
-            receiver, sender = receivers[r_idx], senders[s_idx]
-            amount = min(receiver['amount'], sender['amount'])
-            if amount > 0: trans_list.append(f"**{sender['player'].name}** ➡️ **{receiver['player'].name}**: `{amount:,}원`")
-            receiver['amount'] -= amount
-            sender['amount'] -= amount
-            if receiver['amount'] == 0: r_idx += 1
-            if sender['amount'] == 0: s_idx += 1
+        for s_idx, r_idx, amount in min_transfers([ledger[p] for p in players]):
+            trans_list.append(f"**{players[s_idx].name}** ➡️ **{players[r_idx].name}**: `{amount:,}원`")
         return trans_list
 
     def commit_round(self, round_ledger, scores):